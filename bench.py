@@ -0,0 +1,292 @@
+#!/usr/bin/env python3.13
+# benchmarks for papa-pizza's hot paths, run against a generated (deterministic) db
+#
+# usage:
+#   python bench.py                              # default dataset, json to stdout
+#   python bench.py --orders 200000 -o new.json  # bigger dataset, json to a file
+#   python bench.py --compare old.json           # also print the change against an earlier run
+#
+# the same options + seed always produce the same db, so runs from two versions of
+# main.py can be compared. generated dbs are cached in the temp dir
+
+import argparse
+import io
+import json
+import os
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager, redirect_stdout
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime, timedelta
+from typing import Callable
+
+import main
+from main import PRICING, STORAGE_PROFILES, Application, DatabaseManager
+
+DATASET_END = datetime(2025, 6, 30, 23, 59, 59)  # fixed, so dates never depend on today
+BENCH_PASSWORD = "bench"
+INSERT_CHUNK = 5_000
+
+@dataclass(frozen=True)
+class Dataset:
+    """shape of a generated db"""
+    accounts: int = 50
+    orders: int = 20_000
+    items: int = 3           # distinct menu items per order (capped at the menu size)
+    paid_ratio: float = 0.8
+    days: int = 90           # orders are spread over this many days up to DATASET_END
+    seed: int = 1
+
+    @property
+    def filename(self) -> str:
+        return (f"papa-pizza-bench-a{self.accounts}-o{self.orders}-k{self.items}"
+                f"-p{self.paid_ratio:g}-d{self.days}-s{self.seed}.db")
+
+def generate(dataset: Dataset, path: str):
+    """build a fresh db at path: the normal schema + menu, then dataset's accounts / orders"""
+    rng = random.Random(dataset.seed)
+    db = DatabaseManager(replace(STORAGE_PROFILES["bulk"], path=path))
+    conn = db.conn
+    menu = [(r["id"], r["price_cents"]) for r in conn.execute("SELECT id, price_cents FROM menu ORDER BY id;")]
+    with db.transaction():
+        conn.executemany(
+            "INSERT INTO accounts(username, password, privilege_level) VALUES(?,?,0);",
+            ((f"user{i}", BENCH_PASSWORD) for i in range(1, dataset.accounts + 1))
+        )
+        account_ids = [r[0] for r in conn.execute("SELECT id FROM accounts WHERE username LIKE 'user%' ORDER BY id;")]
+    per_order = min(dataset.items, len(menu))
+    spread = dataset.days * 86_400
+    next_id = 1
+    while next_id <= dataset.orders:
+        order_rows = []
+        item_rows = []
+        for oid in range(next_id, min(next_id + INSERT_CHUNK, dataset.orders + 1)):
+            lines = [(menu_id, price, rng.randint(1, 3)) for menu_id, price in rng.sample(menu, per_order)]
+            loyalty = rng.random() < 0.3
+            paid = rng.random() < dataset.paid_ratio
+            base = sum(price * qty for _, price, qty in lines)
+            created = DATASET_END - timedelta(seconds=rng.randrange(spread))
+            order_rows.append((
+                oid, rng.choice(account_ids), rng.randint(0, 1), loyalty,
+                paid and PRICING.discount_applies(base, loyalty), paid, created.strftime("%Y-%m-%d %H:%M:%S")
+            ))
+            item_rows.extend((oid, menu_id, qty) for menu_id, _, qty in lines)
+        with db.transaction():
+            conn.executemany(
+                """--sql
+                INSERT INTO orders(id, customer_id, service_type, has_loyalty_card, is_discounted, paid, created_at)
+                VALUES(?,?,?,?,?,?,?);
+                """,
+                order_rows
+            )
+            conn.executemany("INSERT INTO order_items(order_id, menu_item_id, quantity) VALUES(?,?,?);", item_rows)
+        next_id += len(order_rows)
+    db.close()
+
+def prepare(dataset: Dataset, data_dir: str) -> str:
+    """path of a scratch copy of the dataset's db (generated first if not cached)"""
+    cached = os.path.join(data_dir, dataset.filename)
+    if not os.path.exists(cached):
+        log(f"generating {dataset.filename} ...")
+        started = time.perf_counter()
+        generate(dataset, cached + ".tmp")
+        os.replace(cached + ".tmp", cached)
+        log(f"generated in {time.perf_counter() - started:.1f}s")
+    # benchmarks write orders, so they get a copy; the cached db stays pristine
+    scratch = os.path.join(data_dir, "papa-pizza-bench-scratch.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(scratch + suffix):
+            os.remove(scratch + suffix)
+    src, dst = sqlite3.connect(cached), sqlite3.connect(scratch)
+    src.backup(dst)
+    src.close()
+    dst.close()
+    return scratch
+
+def log(message: str):
+    """progress goes to stderr so stdout stays pure json"""
+    print(message, file=sys.stderr)
+
+class Bench:
+    """time callables against one Application, counting sqlite statements per run"""
+    def __init__(self, app: Application, repeat: int):
+        self.app = app
+        self.repeat = repeat
+        self.results: dict[str, dict] = {}
+        self._statements = 0
+        app.db.conn.set_trace_callback(self._count)
+
+    def _count(self, _sql: str):
+        self._statements += 1
+
+    def run(self, name: str, fn: Callable[[], object], setup: Callable[[], object] | None = None):
+        """time fn repeat times (setup runs untimed before each); command output is discarded"""
+        times = []
+        statements = []
+        errors_before = main._errors_reported
+        sink = io.StringIO()
+        for _ in range(self.repeat):
+            with redirect_stdout(sink):
+                if setup:
+                    setup()
+                self._statements = 0
+                started = time.perf_counter()
+                fn()
+                times.append(time.perf_counter() - started)
+                statements.append(self._statements)
+            sink.seek(0)
+            sink.truncate()
+        errors = main._errors_reported - errors_before
+        if errors:
+            log(f"  {name}: {errors} error(s), last: {main._last_error}")
+        ms = [t * 1000 for t in times]
+        self.results[name] = {
+            "runs": len(ms),
+            "min_ms": round(min(ms), 3),
+            "median_ms": round(statistics.median(ms), 3),
+            "mean_ms": round(statistics.fmean(ms), 3),
+            "max_ms": round(max(ms), 3),
+            # sqlite statements per run, trigger bodies included
+            "statements": max(statements),
+            "errors": errors,
+        }
+        log(f"  {name:<32}{self.results[name]['median_ms']:>10.3f} ms  {max(statements):>6} stmts")
+
+    @contextmanager
+    def session(self, username: str, password: str):
+        """run the enclosed benchmarks logged in as username"""
+        accounts = self.app.account_manager
+        with redirect_stdout(io.StringIO()):
+            accounts.login(username, password)
+        if accounts.current_user_id is None:
+            raise SystemExit(f"bench: cannot log in as {username}")
+        try:
+            yield
+        finally:
+            with redirect_stdout(io.StringIO()):
+                accounts.logout()
+
+def run_benchmarks(path: str, repeat: int) -> dict[str, dict]:
+    """every hot path, as the busiest customer and then as admin"""
+    app = Application(replace(STORAGE_PROFILES["till"], path=path))
+    main.set_interactive(False)
+    orders = app.order_manager
+    parser = app.parser
+    bench = Bench(app, repeat)
+    menu_name = next(iter(orders.menu)).name
+    range_start = (DATASET_END - timedelta(days=29)).date().isoformat()
+    range_end = DATASET_END.date().isoformat()
+    busiest = app.db.conn.execute(
+        """--sql
+        SELECT a.username FROM orders o JOIN accounts a ON a.id = o.customer_id
+        GROUP BY o.customer_id ORDER BY COUNT(*) DESC, o.customer_id LIMIT 1;
+        """
+    ).fetchone()
+
+    def new_order():
+        orders.create_order("delivery", "y")
+
+    def new_order_with_item():
+        new_order()
+        orders.add_order_item(menu_name, "2")
+
+    def forget_orders():
+        orders._orders.clear()
+
+    if busiest:
+        with bench.session(busiest["username"], BENCH_PASSWORD):
+            # replaces the old eager _refresh_orders: the first order list after login
+            bench.run("order load", orders.first_order_page, setup=forget_orders)
+            bench.run("order item add", lambda: orders.add_order_item(menu_name, "2"), setup=new_order)
+            bench.run("order process", lambda: orders.process_order("y"), setup=new_order_with_item)
+            bench.run("order summary (30 days)", lambda: orders.generate_daily_sales_summary(range_start, range_end))
+            bench.run("parse order list", lambda: parser.parse_and_execute("order list"))
+
+    with bench.session("admin", "admin"):
+        bench.run("admin order summary (30 days)", lambda: orders.generate_daily_sales_summary(range_start, range_end))
+        bench.run("admin report revenue", orders.admin_report_revenue_by_user)
+        bench.run("admin report top-items", orders.admin_report_top_menu_items)
+        bench.run("admin report stats", orders.admin_report_average_order_value)
+        bench.run("admin report discount", orders.admin_report_discount_usage)
+        bench.run("parse account whoami", lambda: parser.parse_and_execute("account whoami"))
+        bench.run("parse admin order list", lambda: parser.parse_and_execute("order list paid"))
+    app.db.close()
+    return bench.results
+
+def git_revision() -> str | None:
+    """short commit of the checkout being measured, if this is a git checkout"""
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+def compare(report: dict, baseline: dict):
+    """print each benchmark's median + statement count against an earlier report"""
+    if baseline.get("dataset") != report["dataset"]:
+        log("warning: baseline was run on a different dataset")
+    log(f"\n{'benchmark':<32}{'before':>10}{'after':>10}{'change':>9}   stmts")
+    for name, now in report["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            log(f"{name:<32}{'-':>10}{now['median_ms']:>10.3f}{'new':>9}")
+            continue
+        change = (now["median_ms"] / before["median_ms"] - 1) * 100 if before["median_ms"] else 0.0
+        log(f"{name:<32}{before['median_ms']:>10.3f}{now['median_ms']:>10.3f}{change:>+8.0f}%"
+            f"   {before['statements']} -> {now['statements']}")
+
+def parse_cli(argv: list[str]) -> argparse.Namespace:
+    """parse benchmark options"""
+    defaults = Dataset()
+    cli = argparse.ArgumentParser(prog="bench.py", description="papa-pizza benchmarks")
+    cli.add_argument("--accounts", type=int, default=defaults.accounts, help="customer accounts to generate")
+    cli.add_argument("--orders", type=int, default=defaults.orders, help="orders to generate")
+    cli.add_argument("--items", type=int, default=defaults.items, help="distinct menu items per order")
+    cli.add_argument("--paid-ratio", type=float, default=defaults.paid_ratio, help="share of orders that are paid (0-1)")
+    cli.add_argument("--days", type=int, default=defaults.days, help="days the orders are spread over")
+    cli.add_argument("--seed", type=int, default=defaults.seed, help="random seed for the dataset")
+    cli.add_argument("--repeat", type=int, default=20, help="timed runs per benchmark")
+    cli.add_argument("--data-dir", default=tempfile.gettempdir(), help="where generated dbs are cached")
+    cli.add_argument("-o", "--output", metavar="FILE", help="write the json report to FILE instead of stdout")
+    cli.add_argument("--compare", metavar="FILE", help="earlier json report to compare against")
+    options = cli.parse_args(argv)
+    if min(options.accounts, options.orders, options.items, options.days, options.repeat) < 1:
+        cli.error("--accounts, --orders, --items, --days and --repeat must be at least 1")
+    if not 0 <= options.paid_ratio <= 1:
+        cli.error("--paid-ratio must be between 0 and 1")
+    return options
+
+def bench_main():
+    """entrypoint"""
+    options = parse_cli(sys.argv[1:])
+    dataset = Dataset(options.accounts, options.orders, options.items, options.paid_ratio, options.days, options.seed)
+    path = prepare(dataset, options.data_dir)
+    log(f"running {options.repeat} x each benchmark")
+    report = {
+        "revision": git_revision(),
+        "python": sys.version.split()[0],
+        "sqlite": sqlite3.sqlite_version,
+        "dataset": asdict(dataset),
+        "repeat": options.repeat,
+        "results": run_benchmarks(path, options.repeat),
+    }
+    text = json.dumps(report, indent=2)
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if options.compare:
+        with open(options.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+if __name__ == "__main__":
+    bench_main()
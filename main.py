@@ -28,30 +28,87 @@
 #   - admin can reset database (deletes ALL data, including accounts)
 #   - enjoy!! this is incredibly overengineered for no reason at all other than spite :)
 
+import time
+_IMPORTS_STARTED = time.perf_counter()  # for --startup-profile
+
+# only what every launch needs is imported here; csv / json / decimal / random
+# are imported inside the (rarely used) functions that need them
+import re
+import shlex
 import sqlite3
 import signal
 import sys
+import os
+import threading
+import heapq
 import atexit
-import inspect
-from dataclasses import dataclass
-from typing import Callable, Sequence
+import argparse
+import io
+from array import array
+from contextlib import contextmanager, nullcontext, redirect_stdout
+from itertools import batched, chain, islice
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime, timezone
+from typing import Callable, Iterable, Iterator, Sequence, TextIO
 from abc import ABC, abstractmethod
 from enum import Enum
 
 from termcolor import cprint, colored
-from colorama import just_fix_windows_console as enable_windows_ansi_interpretation
 
-# fix windows terminal misinterpreting ansi escape sequences
-enable_windows_ansi_interpretation()
+# fix windows terminal misinterpreting ansi escape sequences (nothing to fix elsewhere)
+if sys.platform == "win32":
+    from colorama import just_fix_windows_console as enable_windows_ansi_interpretation
+    enable_windows_ansi_interpretation()
 
 # constants
-GST_RATE = 0.10
-DISCOUNT_RATE = 0.05
-DELIVERY_FEE = 8.00
-DISCOUNT_THRESHOLD = 100.0
-MAX_BATCH_ITEM_ADD = 10
+MAX_BATCH_ITEM_ADD = 500
+ORDER_PAGE_SIZE = 10   # orders per page of order list
+BUSY_RETRIES = 5       # attempts at taking the write lock before giving up
+BUSY_BACKOFF = 0.05    # seconds; doubled (plus jitter) after each busy attempt
+IMPORT_CHUNK_ORDERS = 2_000       # orders written per transaction by admin import
+IMPORT_PROGRESS_EVERY = 20_000    # orders between progress updates
+EXPORT_FETCH_ROWS = 1_000         # rows pulled per fetchmany by admin export
+CHECK_TOTALS_BATCH = 500          # cached order ids per IN (...) query in admin db check-totals
+MAX_MONEY_CENTS = 10_000_000      # $100k; keeps order totals far inside sqlite's int64
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*m")
 
 # helpers
+class NonInteractiveError(Exception):
+    """a command needed keyboard input while running non-interactively (batch mode)"""
+
+_interactive = True
+_errors_reported = 0
+_last_error = ""
+
+def set_interactive(enabled: bool):
+    """allow / forbid prompting; batch mode turns this off so nothing blocks on stdin"""
+    global _interactive
+    _interactive = enabled
+
+def ask(prompt: str) -> str:
+    """input() that fails fast instead of blocking when not interactive"""
+    if not _interactive:
+        raise NonInteractiveError(f"needs interactive input ({ANSI_ESCAPE.sub('', prompt).strip()}); pass it inline")
+    return input(prompt)
+
+def error(message: str):
+    """print an error line (and count it, so batch mode can tell a command failed)"""
+    global _errors_reported, _last_error
+    _errors_reported += 1
+    _last_error = message
+    cprint(message, "red")
+
+STARTUP_PHASES: dict[str, float] = {}  # seconds per start-up phase, for --startup-profile
+
+@contextmanager
+def startup_phase(name: str):
+    """time the block into STARTUP_PHASES[name]"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STARTUP_PHASES[name] = STARTUP_PHASES.get(name, 0.0) + time.perf_counter() - started
+
 def safe_int(value: str, minimum: int | None = None):
     """return int value or none if invalid / below minimum"""
     try:
@@ -62,9 +119,26 @@ def safe_int(value: str, minimum: int | None = None):
     except ValueError:
         return None
 
-def color_money(amount: float) -> str:
-    """format amount as green money string"""
-    return colored(f"${amount:.2f}", "green")
+def format_money(cents: int) -> str:
+    """format integer cents as dollars, e.g. 1950 -> $19.50"""
+    dollars, cents = divmod(cents, 100)
+    return f"${dollars}.{cents:02d}"
+
+def color_money(cents: int) -> str:
+    """format cents as green money string"""
+    return colored(format_money(cents), "green")
+
+def parse_money(value: str) -> int | None:
+    """parse a dollar amount like 24.5 into cents; none if invalid, finer than a cent
+    or over MAX_MONEY_CENTS"""
+    from decimal import Decimal, InvalidOperation
+    try:
+        amount = Decimal(value.strip().lstrip("$"))
+    except InvalidOperation:
+        return None
+    if not amount.is_finite() or amount.as_tuple().exponent < -2 or amount * 100 > MAX_MONEY_CENTS:
+        return None
+    return int(amount * 100)
 
 def parse_boolean_input(prompt: str, handle_invalid: bool = False) -> bool:
     """parse y/n style input; optionally warn on invalid"""
@@ -74,99 +148,864 @@ def parse_boolean_input(prompt: str, handle_invalid: bool = False) -> bool:
     if p in ("n", "no"):
         return False
     if handle_invalid:
-        cprint("invalid input, please try again.", "red")
+        error("invalid input, please try again.")
     return False
 
+def parse_flag(value: object) -> bool | None:
+    """parse a yes/no style field from an import file (none if unrecognised)"""
+    if isinstance(value, bool):
+        return value
+    v = str(value).strip().lower()
+    if v in ("y", "yes", "true", "1"):
+        return True
+    if v in ("n", "no", "false", "0", ""):
+        return False
+    return None
+
+def is_busy_error(exc: sqlite3.Error) -> bool:
+    """true if sqlite reports the database as busy / locked by another connection"""
+    code = getattr(exc, "sqlite_errorcode", None)
+    return code is not None and code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+
+# pricing
+@dataclass(frozen=True)
+class PricingEngine:
+    """the discount / delivery / gst rules, in one place. Order uses it directly and
+    every connection registers it as sql functions, so order_totals_live and the
+    reports compute totals with this same code. money is integer cents, rates are
+    whole percents"""
+    gst_percent: int = 10
+    discount_percent: int = 5
+    delivery_fee_cents: int = 800
+    discount_threshold_cents: int = 10_000
+
+    def discount_applies(self, base_cents: int, has_loyalty_card: bool) -> bool:
+        """big orders and loyalty card holders get the discount"""
+        return base_cents > self.discount_threshold_cents or bool(has_loyalty_card)
+
+    def total_cents(self, base_cents: int, discounted: bool, delivery: bool) -> int:
+        """final price: discount, then delivery fee, then gst. kept exact (in
+        hundredths of a cent) and rounded half-up once at the end"""
+        scaled = base_cents * (100 - (self.discount_percent if discounted else 0))
+        scaled += (self.delivery_fee_cents if delivery else 0) * 100
+        scaled *= 100 + self.gst_percent
+        return (scaled + 5_000) // 10_000
+
+    @property
+    def fingerprint(self) -> str:
+        """identifies the rule set; stored next to order_totals to spot rate changes"""
+        return f"gst={self.gst_percent};discount={self.discount_percent};" \
+               f"delivery={self.delivery_fee_cents};threshold={self.discount_threshold_cents}"
+
+    def register(self, conn: sqlite3.Connection):
+        """expose the rules to sql (deterministic, so sqlite may cache / reuse results)"""
+        conn.create_function("order_discount_applies", 2, self.discount_applies, deterministic=True)
+        conn.create_function("order_total_cents", 3, self.total_cents, deterministic=True)
+
+PRICING = PricingEngine()
+
+# schema migrations; index + 1 is the PRAGMA user_version after applying it.
+# only ever append to this list, never edit an entry that has shipped
+MIGRATIONS: list[str] = [
+    # 1: base schema (IF NOT EXISTS so pre-migration databases adopt it cleanly)
+    """--sql
+    CREATE TABLE IF NOT EXISTS accounts (
+        id INTEGER PRIMARY KEY,
+        username TEXT NOT NULL UNIQUE COLLATE NOCASE,
+        password TEXT NOT NULL, -- should be hashed but cmon now it's a school project
+        privilege_level INT NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS menu (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL UNIQUE,
+        price REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS orders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        customer_id INTEGER,
+        service_type INTEGER NOT NULL,
+        has_loyalty_card INTEGER NOT NULL,
+        is_discounted INTEGER NOT NULL DEFAULT 0,
+        paid INTEGER NOT NULL DEFAULT 0,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(customer_id) REFERENCES accounts(id) ON DELETE SET NULL
+    );
+    CREATE TABLE IF NOT EXISTS order_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        order_id INTEGER NOT NULL,
+        menu_item_id INTEGER NOT NULL,
+        FOREIGN KEY(order_id) REFERENCES orders(id) ON DELETE CASCADE,
+        FOREIGN KEY(menu_item_id) REFERENCES menu(id)
+    );
+    CREATE TRIGGER IF NOT EXISTS trg_menu_price_insert
+    BEFORE INSERT ON menu
+    WHEN NEW.price <= 0
+    BEGIN
+        SELECT RAISE(ABORT, 'price must be positive');
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_menu_price_update
+    BEFORE UPDATE ON menu
+    WHEN NEW.price <= 0
+    BEGIN
+        SELECT RAISE(ABORT, 'price must be positive');
+    END;
+    CREATE VIEW IF NOT EXISTS order_totals AS
+    SELECT
+        o.id AS order_id,
+        o.customer_id,
+        o.service_type,
+        o.has_loyalty_card,
+        o.is_discounted,
+        o.paid,
+        o.created_at,
+        COALESCE(SUM(m.price),0) AS base_total,
+        CASE WHEN COALESCE(SUM(m.price),0) > 100 OR o.has_loyalty_card = 1 THEN 1 ELSE 0 END AS discount_applies,
+        ROUND(((CASE WHEN (COALESCE(SUM(m.price),0) > 100 OR o.has_loyalty_card=1)
+            THEN COALESCE(SUM(m.price),0) * 0.95 ELSE COALESCE(SUM(m.price),0) END)
+            + CASE WHEN o.service_type=1 THEN 8.0 ELSE 0 END) * 1.1, 2) AS final_total
+    FROM orders o
+    LEFT JOIN order_items oi ON oi.order_id = o.id
+    LEFT JOIN menu m ON m.id = oi.menu_item_id
+    GROUP BY o.id;
+    """,
+    # 2: indexes for the hot order / menu lookups
+    """--sql
+    CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items(order_id, menu_item_id);
+    -- covers the per-user order listing so it never touches the table
+    CREATE INDEX IF NOT EXISTS idx_orders_customer
+        ON orders(customer_id, paid, service_type, has_loyalty_card, is_discounted);
+    CREATE INDEX IF NOT EXISTS idx_orders_paid_created ON orders(paid, created_at);
+    CREATE INDEX IF NOT EXISTS idx_menu_name_nocase ON menu(name COLLATE NOCASE);
+    """,
+    # 3: materialise order_totals into a trigger-maintained table; the original
+    # view lives on as order_totals_live and is the single definition of the maths
+    """--sql
+    DROP VIEW IF EXISTS order_totals;
+    CREATE VIEW order_totals_live AS
+    SELECT
+        o.id AS order_id,
+        o.customer_id,
+        o.service_type,
+        o.has_loyalty_card,
+        o.is_discounted,
+        o.paid,
+        o.created_at,
+        COALESCE(SUM(m.price),0) AS base_total,
+        CASE WHEN COALESCE(SUM(m.price),0) > 100 OR o.has_loyalty_card = 1 THEN 1 ELSE 0 END AS discount_applies,
+        ROUND(((CASE WHEN (COALESCE(SUM(m.price),0) > 100 OR o.has_loyalty_card=1)
+            THEN COALESCE(SUM(m.price),0) * 0.95 ELSE COALESCE(SUM(m.price),0) END)
+            + CASE WHEN o.service_type=1 THEN 8.0 ELSE 0 END) * 1.1, 2) AS final_total
+    FROM orders o
+    LEFT JOIN order_items oi ON oi.order_id = o.id
+    LEFT JOIN menu m ON m.id = oi.menu_item_id
+    GROUP BY o.id;
+    CREATE TABLE order_totals (
+        order_id INTEGER PRIMARY KEY,
+        customer_id INTEGER,
+        service_type INTEGER NOT NULL,
+        has_loyalty_card INTEGER NOT NULL,
+        is_discounted INTEGER NOT NULL,
+        paid INTEGER NOT NULL,
+        created_at TEXT,
+        base_total REAL NOT NULL,
+        discount_applies INTEGER NOT NULL,
+        final_total REAL NOT NULL
+    );
+    INSERT INTO order_totals SELECT * FROM order_totals_live;
+    CREATE INDEX idx_order_totals_paid ON order_totals(paid, created_at);
+    -- lets the menu price trigger (and menu deletes) find affected orders
+    CREATE INDEX idx_order_items_menu ON order_items(menu_item_id);
+    CREATE TRIGGER trg_order_totals_order_insert
+    AFTER INSERT ON orders
+    BEGIN
+        INSERT OR REPLACE INTO order_totals SELECT * FROM order_totals_live WHERE order_id = NEW.id;
+    END;
+    CREATE TRIGGER trg_order_totals_order_update
+    AFTER UPDATE ON orders
+    BEGIN
+        INSERT OR REPLACE INTO order_totals SELECT * FROM order_totals_live WHERE order_id = NEW.id;
+    END;
+    CREATE TRIGGER trg_order_totals_order_delete
+    AFTER DELETE ON orders
+    BEGIN
+        DELETE FROM order_totals WHERE order_id = OLD.id;
+    END;
+    CREATE TRIGGER trg_order_totals_item_insert
+    AFTER INSERT ON order_items
+    BEGIN
+        INSERT OR REPLACE INTO order_totals SELECT * FROM order_totals_live WHERE order_id = NEW.order_id;
+    END;
+    CREATE TRIGGER trg_order_totals_item_delete
+    AFTER DELETE ON order_items
+    BEGIN
+        INSERT OR REPLACE INTO order_totals SELECT * FROM order_totals_live WHERE order_id = OLD.order_id;
+    END;
+    CREATE TRIGGER trg_order_totals_menu_price
+    AFTER UPDATE OF price ON menu
+    BEGIN
+        INSERT OR REPLACE INTO order_totals
+        SELECT * FROM order_totals_live
+        WHERE order_id IN (SELECT order_id FROM order_items WHERE menu_item_id = NEW.id);
+    END;
+    """,
+    # 4: one order_items row per (order, menu item) with a quantity, instead of
+    # one row per unit. the view + totals triggers depend on the table, so they
+    # are dropped and recreated around the rebuild (delete + insert rather than
+    # INSERT OR REPLACE, since an outer upsert overrides a trigger's conflict clause)
+    """--sql
+    DROP TRIGGER trg_order_totals_order_insert;
+    DROP TRIGGER trg_order_totals_order_update;
+    DROP TRIGGER trg_order_totals_order_delete;
+    DROP TRIGGER trg_order_totals_item_insert;
+    DROP TRIGGER trg_order_totals_item_delete;
+    DROP TRIGGER trg_order_totals_menu_price;
+    DROP VIEW order_totals_live;
+    CREATE TABLE order_items_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        order_id INTEGER NOT NULL,
+        menu_item_id INTEGER NOT NULL,
+        quantity INTEGER NOT NULL DEFAULT 1 CHECK (quantity > 0),
+        UNIQUE(order_id, menu_item_id),
+        FOREIGN KEY(order_id) REFERENCES orders(id) ON DELETE CASCADE,
+        FOREIGN KEY(menu_item_id) REFERENCES menu(id)
+    );
+    INSERT INTO order_items_new(id, order_id, menu_item_id, quantity)
+    SELECT MIN(id), order_id, menu_item_id, COUNT(*)
+    FROM order_items
+    GROUP BY order_id, menu_item_id;
+    DROP TABLE order_items;
+    ALTER TABLE order_items_new RENAME TO order_items;
+    -- UNIQUE(order_id, menu_item_id) already indexes lookups by order
+    CREATE INDEX idx_order_items_menu ON order_items(menu_item_id);
+    CREATE VIEW order_totals_live AS
+    SELECT
+        o.id AS order_id,
+        o.customer_id,
+        o.service_type,
+        o.has_loyalty_card,
+        o.is_discounted,
+        o.paid,
+        o.created_at,
+        COALESCE(SUM(m.price * oi.quantity),0) AS base_total,
+        CASE WHEN COALESCE(SUM(m.price * oi.quantity),0) > 100 OR o.has_loyalty_card = 1 THEN 1 ELSE 0 END AS discount_applies,
+        ROUND(((CASE WHEN (COALESCE(SUM(m.price * oi.quantity),0) > 100 OR o.has_loyalty_card=1)
+            THEN COALESCE(SUM(m.price * oi.quantity),0) * 0.95 ELSE COALESCE(SUM(m.price * oi.quantity),0) END)
+            + CASE WHEN o.service_type=1 THEN 8.0 ELSE 0 END) * 1.1, 2) AS final_total
+    FROM orders o
+    LEFT JOIN order_items oi ON oi.order_id = o.id
+    LEFT JOIN menu m ON m.id = oi.menu_item_id
+    GROUP BY o.id;
+    CREATE TRIGGER trg_order_totals_order_insert
+    AFTER INSERT ON orders
+    BEGIN
+        DELETE FROM order_totals WHERE order_id = NEW.id;
+        INSERT INTO order_totals SELECT * FROM order_totals_live WHERE order_id = NEW.id;
+    END;
+    CREATE TRIGGER trg_order_totals_order_update
+    AFTER UPDATE ON orders
+    BEGIN
+        DELETE FROM order_totals WHERE order_id = NEW.id;
+        INSERT INTO order_totals SELECT * FROM order_totals_live WHERE order_id = NEW.id;
+    END;
+    CREATE TRIGGER trg_order_totals_order_delete
+    AFTER DELETE ON orders
+    BEGIN
+        DELETE FROM order_totals WHERE order_id = OLD.id;
+    END;
+    CREATE TRIGGER trg_order_totals_item_insert
+    AFTER INSERT ON order_items
+    BEGIN
+        DELETE FROM order_totals WHERE order_id = NEW.order_id;
+        INSERT INTO order_totals SELECT * FROM order_totals_live WHERE order_id = NEW.order_id;
+    END;
+    CREATE TRIGGER trg_order_totals_item_update
+    AFTER UPDATE OF quantity ON order_items
+    BEGIN
+        DELETE FROM order_totals WHERE order_id = NEW.order_id;
+        INSERT INTO order_totals SELECT * FROM order_totals_live WHERE order_id = NEW.order_id;
+    END;
+    CREATE TRIGGER trg_order_totals_item_delete
+    AFTER DELETE ON order_items
+    BEGIN
+        DELETE FROM order_totals WHERE order_id = OLD.order_id;
+        INSERT INTO order_totals SELECT * FROM order_totals_live WHERE order_id = OLD.order_id;
+    END;
+    CREATE TRIGGER trg_order_totals_menu_price
+    AFTER UPDATE OF price ON menu
+    BEGIN
+        DELETE FROM order_totals
+        WHERE order_id IN (SELECT order_id FROM order_items WHERE menu_item_id = NEW.id);
+        INSERT INTO order_totals
+        SELECT * FROM order_totals_live
+        WHERE order_id IN (SELECT order_id FROM order_items WHERE menu_item_id = NEW.id);
+    END;
+    """,
+    # 5: money as integer cents. menu.price (real dollars) becomes price_cents and
+    # order_totals is rebuilt in cents; everything reading the old column is dropped
+    # first. the view scales by 100 twice (percent discount, percent gst) and rounds
+    # half-up once at the end
+    """--sql
+    DROP TRIGGER trg_menu_price_insert;
+    DROP TRIGGER trg_menu_price_update;
+    DROP TRIGGER trg_order_totals_order_insert;
+    DROP TRIGGER trg_order_totals_order_update;
+    DROP TRIGGER trg_order_totals_order_delete;
+    DROP TRIGGER trg_order_totals_item_insert;
+    DROP TRIGGER trg_order_totals_item_update;
+    DROP TRIGGER trg_order_totals_item_delete;
+    DROP TRIGGER trg_order_totals_menu_price;
+    DROP VIEW order_totals_live;
+    DROP TABLE order_totals;
+    ALTER TABLE menu ADD COLUMN price_cents INTEGER NOT NULL DEFAULT 0;
+    UPDATE menu SET price_cents = CAST(ROUND(price * 100) AS INTEGER);
+    ALTER TABLE menu DROP COLUMN price;
+    CREATE TRIGGER trg_menu_price_insert
+    BEFORE INSERT ON menu
+    WHEN NEW.price_cents <= 0
+    BEGIN
+        SELECT RAISE(ABORT, 'price must be positive');
+    END;
+    CREATE TRIGGER trg_menu_price_update
+    BEFORE UPDATE ON menu
+    WHEN NEW.price_cents <= 0
+    BEGIN
+        SELECT RAISE(ABORT, 'price must be positive');
+    END;
+    CREATE VIEW order_totals_live AS
+    SELECT
+        t.*,
+        t.base_cents > 10000 OR t.has_loyalty_card = 1 AS discount_applies,
+        ((t.base_cents * CASE WHEN t.base_cents > 10000 OR t.has_loyalty_card = 1 THEN 95 ELSE 100 END
+            + CASE WHEN t.service_type = 1 THEN 800 ELSE 0 END * 100) * 110 + 5000) / 10000 AS final_cents
+    FROM (
+        SELECT
+            o.id AS order_id,
+            o.customer_id,
+            o.service_type,
+            o.has_loyalty_card,
+            o.is_discounted,
+            o.paid,
+            o.created_at,
+            COALESCE(SUM(m.price_cents * oi.quantity), 0) AS base_cents
+        FROM orders o
+        LEFT JOIN order_items oi ON oi.order_id = o.id
+        LEFT JOIN menu m ON m.id = oi.menu_item_id
+        GROUP BY o.id
+    ) t;
+    CREATE TABLE order_totals (
+        order_id INTEGER PRIMARY KEY,
+        customer_id INTEGER,
+        service_type INTEGER NOT NULL,
+        has_loyalty_card INTEGER NOT NULL,
+        is_discounted INTEGER NOT NULL,
+        paid INTEGER NOT NULL,
+        created_at TEXT,
+        base_cents INTEGER NOT NULL,
+        discount_applies INTEGER NOT NULL,
+        final_cents INTEGER NOT NULL
+    );
+    INSERT INTO order_totals SELECT * FROM order_totals_live;
+    CREATE INDEX idx_order_totals_paid ON order_totals(paid, created_at);
+    CREATE TRIGGER trg_order_totals_order_insert
+    AFTER INSERT ON orders
+    BEGIN
+        DELETE FROM order_totals WHERE order_id = NEW.id;
+        INSERT INTO order_totals SELECT * FROM order_totals_live WHERE order_id = NEW.id;
+    END;
+    CREATE TRIGGER trg_order_totals_order_update
+    AFTER UPDATE ON orders
+    BEGIN
+        DELETE FROM order_totals WHERE order_id = NEW.id;
+        INSERT INTO order_totals SELECT * FROM order_totals_live WHERE order_id = NEW.id;
+    END;
+    CREATE TRIGGER trg_order_totals_order_delete
+    AFTER DELETE ON orders
+    BEGIN
+        DELETE FROM order_totals WHERE order_id = OLD.id;
+    END;
+    CREATE TRIGGER trg_order_totals_item_insert
+    AFTER INSERT ON order_items
+    BEGIN
+        DELETE FROM order_totals WHERE order_id = NEW.order_id;
+        INSERT INTO order_totals SELECT * FROM order_totals_live WHERE order_id = NEW.order_id;
+    END;
+    CREATE TRIGGER trg_order_totals_item_update
+    AFTER UPDATE OF quantity ON order_items
+    BEGIN
+        DELETE FROM order_totals WHERE order_id = NEW.order_id;
+        INSERT INTO order_totals SELECT * FROM order_totals_live WHERE order_id = NEW.order_id;
+    END;
+    CREATE TRIGGER trg_order_totals_item_delete
+    AFTER DELETE ON order_items
+    BEGIN
+        DELETE FROM order_totals WHERE order_id = OLD.order_id;
+        INSERT INTO order_totals SELECT * FROM order_totals_live WHERE order_id = OLD.order_id;
+    END;
+    CREATE TRIGGER trg_order_totals_menu_price
+    AFTER UPDATE OF price_cents ON menu
+    BEGIN
+        DELETE FROM order_totals
+        WHERE order_id IN (SELECT order_id FROM order_items WHERE menu_item_id = NEW.id);
+        INSERT INTO order_totals
+        SELECT * FROM order_totals_live
+        WHERE order_id IN (SELECT order_id FROM order_items WHERE menu_item_id = NEW.id);
+    END;
+    """,
+    # 6: the view prices orders through the PricingEngine sql functions instead of
+    # its own copy of the rates. pricing_state records which rules order_totals was
+    # computed with (DatabaseManager fills it in and rebuilds when they change)
+    """--sql
+    DROP VIEW order_totals_live;
+    CREATE VIEW order_totals_live AS
+    SELECT
+        t.*,
+        order_discount_applies(t.base_cents, t.has_loyalty_card) AS discount_applies,
+        order_total_cents(t.base_cents, order_discount_applies(t.base_cents, t.has_loyalty_card),
+                          t.service_type = 1) AS final_cents
+    FROM (
+        SELECT
+            o.id AS order_id,
+            o.customer_id,
+            o.service_type,
+            o.has_loyalty_card,
+            o.is_discounted,
+            o.paid,
+            o.created_at,
+            COALESCE(SUM(m.price_cents * oi.quantity), 0) AS base_cents
+        FROM orders o
+        LEFT JOIN order_items oi ON oi.order_id = o.id
+        LEFT JOIN menu m ON m.id = oi.menu_item_id
+        GROUP BY o.id
+    ) t;
+    CREATE TABLE pricing_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        fingerprint TEXT NOT NULL
+    );
+    """,
+    # 7: order list date filters without paid / unpaid (orders(paid, created_at)
+    # can't serve those, so they scanned every order)
+    """--sql
+    CREATE INDEX idx_orders_created ON orders(created_at);
+    """,
+    # 8: a user's order list walks (customer_id, id) newest first and stops after a
+    # page; the old covering index had id last, so every page sorted the user's whole
+    # history. it served nothing else, so it goes
+    """--sql
+    DROP INDEX IF EXISTS idx_orders_customer;
+    CREATE INDEX idx_orders_customer_id ON orders(customer_id, id);
+    """,
+    # 9: a counter bumped by every menu change, so tills re-read the menu only when
+    # it changed rather than on any other till's commit
+    """--sql
+    CREATE TABLE menu_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    );
+    INSERT INTO menu_version(id, version) VALUES(1, 0);
+    CREATE TRIGGER trg_menu_version_insert AFTER INSERT ON menu
+    BEGIN
+        UPDATE menu_version SET version = version + 1;
+    END;
+    CREATE TRIGGER trg_menu_version_update AFTER UPDATE ON menu
+    BEGIN
+        UPDATE menu_version SET version = version + 1;
+    END;
+    CREATE TRIGGER trg_menu_version_delete AFTER DELETE ON menu
+    BEGIN
+        UPDATE menu_version SET version = version + 1;
+    END;
+    """,
+]
+
+# storage tuning
+@dataclass(frozen=True)
+class StorageProfile:
+    """sqlite file + pragmas applied to every connection"""
+    path: str = "papa-pizza.db"
+    journal_mode: str = "WAL"     # lets reports read while a till is writing
+    synchronous: str = "NORMAL"   # fsync at checkpoints only; safe with WAL
+    cache_size: int = -16_000     # negative = KiB, so ~16mb of page cache
+    mmap_size: int = 64 * 1024 * 1024
+    temp_store: str = "MEMORY"
+    busy_timeout: int = 5_000     # ms to wait on a locked db before erroring
+
+STORAGE_PROFILES: dict[str, StorageProfile] = {
+    # everyday counter use
+    "till": StorageProfile(),
+    # big imports / rebuilds: no fsync, much bigger cache. a crash can lose
+    # the last transactions, so don't run tills against it
+    "bulk": StorageProfile(
+        synchronous="OFF",
+        cache_size=-256_000,
+        mmap_size=256 * 1024 * 1024,
+        busy_timeout=30_000,
+    ),
+}
+DEFAULT_STORAGE_PROFILE = "till"
+
+# sql tracing (opt-in with --trace-sql / --sql-log)
+@dataclass(slots=True)
+class SqlStats:
+    """sql totals for one command run, or summed over every run of a command"""
+    runs: int = 0
+    statements: int = 0      # as seen by sqlite's trace hook, so trigger bodies count too
+    calls: int = 0           # execute / executemany / executescript calls
+    sql_seconds: float = 0.0
+    wall_seconds: float = 0.0
+    slowest_seconds: float = 0.0
+    slowest_sql: str = ""
+
+class SqlTracer:
+    """collect per-command statement counts + sql time. connections only report here
+    when tracing was enabled before they were opened, so it costs nothing otherwise"""
+    SLOWEST_KEPT = 10
+    OUTSIDE_COMMANDS = "(outside commands)"  # start-up, repl prompts etc
+
+    def __init__(self):
+        self.enabled = False
+        self.log: TextIO | None = None
+        self.reset()
+
+    def enable(self, log_path: str | None = None):
+        """turn tracing on; with log_path, also append one json line per command run"""
+        self.enabled = True
+        if log_path:
+            self.log = open(log_path, "a", encoding="utf-8")
+            atexit.register(self.log.close)
+
+    def reset(self):
+        """forget everything collected so far"""
+        self.commands: dict[str, SqlStats] = {}
+        self.slowest: list[tuple[float, str, str]] = []  # min-heap of (seconds, command, sql)
+        self._command = self.OUTSIDE_COMMANDS
+        self._run = self.commands.setdefault(self._command, SqlStats())
+
+    def statement(self, _sql: str):
+        """sqlite trace callback: one call per statement started"""
+        self._run.statements += 1
+
+    def timed(self, sql: str, seconds: float):
+        """record one execute* call made through a TracedConnection"""
+        run = self._run
+        run.calls += 1
+        run.sql_seconds += seconds
+        if seconds > run.slowest_seconds:
+            run.slowest_seconds = seconds
+            run.slowest_sql = sql
+        if len(self.slowest) < self.SLOWEST_KEPT:
+            heapq.heappush(self.slowest, (seconds, self._command, sql))
+        elif seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (seconds, self._command, sql))
+
+    def command(self, name: str):
+        """context that attributes the sql run inside it to command name"""
+        return self._traced(name) if self.enabled else nullcontext()
+
+    @contextmanager
+    def _traced(self, name: str):
+        outer = self._command, self._run
+        self._command, self._run = name, SqlStats(runs=1)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            run = self._run
+            run.wall_seconds = time.perf_counter() - started
+            self._command, self._run = outer
+            if self._command == self.OUTSIDE_COMMANDS:
+                # a reset inside the command replaced the outside bucket
+                self._run = self.commands.setdefault(self._command, SqlStats())
+            total = self.commands.setdefault(name, SqlStats())
+            total.runs += 1
+            total.statements += run.statements
+            total.calls += run.calls
+            total.sql_seconds += run.sql_seconds
+            total.wall_seconds += run.wall_seconds
+            if run.slowest_seconds > total.slowest_seconds:
+                total.slowest_seconds, total.slowest_sql = run.slowest_seconds, run.slowest_sql
+            if self.log:
+                self._write_log(name, run)
+
+    def _write_log(self, name: str, run: SqlStats):
+        import json
+        self.log.write(json.dumps({
+            "at": datetime.now().isoformat(timespec="milliseconds"),
+            "command": name,
+            "statements": run.statements,
+            "calls": run.calls,
+            "sql_ms": round(run.sql_seconds * 1000, 3),
+            "wall_ms": round(run.wall_seconds * 1000, 3),
+            "slowest_ms": round(run.slowest_seconds * 1000, 3),
+            "slowest_sql": self.one_line(run.slowest_sql),
+        }) + "\n")
+        self.log.flush()
+
+    @staticmethod
+    def one_line(sql: str, limit: int | None = None) -> str:
+        """sql with the --sql marker + indentation squeezed out, optionally cut to limit"""
+        text = " ".join(sql.removeprefix("--sql").split())
+        return text if limit is None or len(text) <= limit else text[:limit - 3] + "..."
+
+    def show_stats(self, action: str | None = None):
+        """print per-command sql stats + the slowest statements ('reset' clears them)"""
+        if not self.enabled:
+            cprint("sql tracing is off; start with --trace-sql (or --sql-log FILE)", "yellow"); return
+        if action == "reset":
+            self.reset()
+            cprint("sql stats cleared", "green"); return
+        if action is not None:
+            error("usage: admin debug stats [reset]"); return
+        cprint(f"{'command':<28}{'runs':>6}{'stmts/run':>11}{'calls/run':>11}{'sql ms/run':>12}{'wall ms/run':>13}",
+               None, attrs=["bold"])
+        for name, total in sorted(self.commands.items(), key=lambda kv: kv[1].sql_seconds, reverse=True):
+            runs = total.runs or 1  # outside commands is one open-ended "run" with no wall time
+            wall = f"{total.wall_seconds * 1000 / runs:.2f}" if total.runs else "-"
+            print(f"{name:<28}{total.runs or '-':>6}{total.statements / runs:>11.1f}{total.calls / runs:>11.1f}"
+                  f"{total.sql_seconds * 1000 / runs:>12.2f}{wall:>13}")
+        if self.slowest:
+            cprint("\nslowest statements:", None, attrs=["bold"])
+            for seconds, name, sql in sorted(self.slowest, reverse=True):
+                print(f"{seconds * 1000:>9.2f} ms  {colored(name, 'blue')}  {self.one_line(sql, 90)}")
+
+SQL_TRACER = SqlTracer()
+
+class TracedCursor(sqlite3.Cursor):
+    """cursor that times its statement into SQL_TRACER from execute until the rows
+    run out (or it is re-executed, closed or dropped), so streamed reads count too"""
+    _sql: str | None = None
+    _seconds = 0.0
+
+    def execute(self, sql: str, parameters=(), /) -> "TracedCursor":
+        self._finish()
+        started = time.perf_counter()
+        try:
+            super().execute(sql, parameters)
+        finally:
+            self._sql, self._seconds = sql, time.perf_counter() - started
+        if self.description is None:
+            self._finish()  # no rows to wait for
+        return self
+
+    def _fetch(self, fetch: Callable, *args):
+        started = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            self._seconds += time.perf_counter() - started
+
+    def __next__(self):
+        try:
+            return self._fetch(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+
+    def fetchone(self):
+        row = self._fetch(super().fetchone)
+        if row is None:
+            self._finish()
+        return row
+
+    def fetchmany(self, size: int | None = None):
+        size = self.arraysize if size is None else size
+        rows = self._fetch(super().fetchmany, size)
+        if len(rows) < size:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._fetch(super().fetchall)
+        self._finish()
+        return rows
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        self._finish()
+
+    def _finish(self):
+        if self._sql is not None:
+            SQL_TRACER.timed(self._sql, self._seconds)
+            self._sql = None
+
+class TracedConnection(sqlite3.Connection):
+    """connection that times every execute* call into SQL_TRACER. queries run on a
+    TracedCursor, so their time includes reading the rows, not just the first one"""
+    def execute(self, sql: str, parameters=(), /) -> sqlite3.Cursor:
+        return self.cursor(TracedCursor).execute(sql, parameters)
+
+    def executemany(self, sql: str, parameters, /) -> sqlite3.Cursor:
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, parameters)
+        finally:
+            SQL_TRACER.timed(sql, time.perf_counter() - started)
+
+    def executescript(self, script: str, /) -> sqlite3.Cursor:
+        started = time.perf_counter()
+        try:
+            return super().executescript(script)
+        finally:
+            SQL_TRACER.timed(script, time.perf_counter() - started)
+
 # database layer
+class ConnectionPool:
+    """one connection per thread, since sqlite connections can't be used by two threads
+    at once; at most `size` in all, and a thread past the cap gets an error, never a wait"""
+    def __init__(self, connect: Callable[[], sqlite3.Connection], size: int = 4):
+        self._connect = connect
+        self._size = size
+        self._opened: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def get(self) -> sqlite3.Connection:
+        """connection bound to the calling thread (opened on first use)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._open()
+        return conn
+
+    def _open(self) -> sqlite3.Connection:
+        """open a connection for the calling thread, unless the cap is reached"""
+        with self._lock:
+            if len(self._opened) >= self._size:
+                raise RuntimeError(f"connection pool exhausted ({self._size} threads already hold a connection)")
+            conn = self._connect()
+            self._opened.append(conn)
+            return conn
+
+    def close(self):
+        """close every connection the pool opened"""
+        with self._lock:
+            for conn in self._opened:
+                conn.close()
+            self._opened.clear()
+
 class DatabaseManager:
-    """manage sqlite connection and schema (yes still flat + simple)"""
-    def __init__(self):
-        self.conn = sqlite3.connect("papa-pizza.db")
-        self.conn.row_factory = sqlite3.Row
-        self.conn.autocommit = True
-        self.conn.execute("--sql\nPRAGMA foreign_keys=ON;")
-        self._create_schema()
-        self._seed_menu()
-        self._seed_default_user()
-
-    def _create_schema(self):
-        """create tables / triggers / view if missing"""
-        self.conn.executescript(
-            """--sql
-            CREATE TABLE IF NOT EXISTS accounts (
-                id INTEGER PRIMARY KEY,
-                username TEXT NOT NULL UNIQUE COLLATE NOCASE,
-                password TEXT NOT NULL, -- should be hashed but cmon now it's a school project
-                privilege_level INT NOT NULL DEFAULT 0
-            );
-            CREATE TABLE IF NOT EXISTS menu (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE,
-                price REAL NOT NULL
-            );
-            CREATE TABLE IF NOT EXISTS orders (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                customer_id INTEGER,
-                service_type INTEGER NOT NULL,
-                has_loyalty_card INTEGER NOT NULL,
-                is_discounted INTEGER NOT NULL DEFAULT 0,
-                paid INTEGER NOT NULL DEFAULT 0,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(customer_id) REFERENCES accounts(id) ON DELETE SET NULL
-            );
-            CREATE TABLE IF NOT EXISTS order_items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                order_id INTEGER NOT NULL,
-                menu_item_id INTEGER NOT NULL,
-                FOREIGN KEY(order_id) REFERENCES orders(id) ON DELETE CASCADE,
-                FOREIGN KEY(menu_item_id) REFERENCES menu(id)
-            );
-            CREATE TRIGGER IF NOT EXISTS trg_menu_price_insert
-            BEFORE INSERT ON menu
-            WHEN NEW.price <= 0
-            BEGIN
-                SELECT RAISE(ABORT, 'price must be positive');
-            END;
-            CREATE TRIGGER IF NOT EXISTS trg_menu_price_update
-            BEFORE UPDATE ON menu
-            WHEN NEW.price <= 0
-            BEGIN
-                SELECT RAISE(ABORT, 'price must be positive');
-            END;
-            CREATE VIEW IF NOT EXISTS order_totals AS
-            SELECT
-                o.id AS order_id,
-                o.customer_id,
-                o.service_type,
-                o.has_loyalty_card,
-                o.is_discounted,
-                o.paid,
-                o.created_at,
-                COALESCE(SUM(m.price),0) AS base_total,
-                CASE WHEN COALESCE(SUM(m.price),0) > 100 OR o.has_loyalty_card = 1 THEN 1 ELSE 0 END AS discount_applies,
-                ROUND(((CASE WHEN (COALESCE(SUM(m.price),0) > 100 OR o.has_loyalty_card=1)
-                    THEN COALESCE(SUM(m.price),0) * 0.95 ELSE COALESCE(SUM(m.price),0) END)
-                    + CASE WHEN o.service_type=1 THEN 8.0 ELSE 0 END) * 1.1, 2) AS final_total
-            FROM orders o
-            LEFT JOIN order_items oi ON oi.order_id = o.id
-            LEFT JOIN menu m ON m.id = oi.menu_item_id
-            GROUP BY o.id;
+    """manage sqlite connections and schema (yes still flat + simple)"""
+    def __init__(self, profile: StorageProfile = STORAGE_PROFILES[DEFAULT_STORAGE_PROFILE], pool_size: int = 4):
+        self.profile = profile
+        self.pool = ConnectionPool(self._connect, pool_size)
+        with startup_phase("connect"):
+            self.conn
+        # an up-to-date db costs one PRAGMA read here: no DDL, no seeding
+        with startup_phase("schema"):
+            fresh = self._migrate() == 0
+        if fresh:
+            with startup_phase("seed"):
+                self._seed_menu()
+                self._seed_default_user()
+        with startup_phase("pricing check"):
+            self._sync_pricing()
+
+    def _connect(self) -> sqlite3.Connection:
+        """open a connection with the storage profile applied"""
+        p = self.profile
+        # pooled connections move between threads, but only ever one thread at a time
+        conn = sqlite3.connect(p.path, check_same_thread=False,
+                               factory=TracedConnection if SQL_TRACER.enabled else sqlite3.Connection)
+        if SQL_TRACER.enabled:
+            conn.set_trace_callback(SQL_TRACER.statement)
+        conn.row_factory = sqlite3.Row
+        PRICING.register(conn)
+        conn.autocommit = True
+        # trusted_schema: the totals view + triggers call the pricing functions, which
+        # python can't mark innocuous, so hardened builds (default OFF) would refuse them
+        conn.executescript(
+            f"""--sql
+            PRAGMA busy_timeout={int(p.busy_timeout)};
+            PRAGMA journal_mode={p.journal_mode};
+            PRAGMA synchronous={p.synchronous};
+            PRAGMA cache_size={int(p.cache_size)};
+            PRAGMA mmap_size={int(p.mmap_size)};
+            PRAGMA temp_store={p.temp_store};
+            PRAGMA foreign_keys=ON;
+            PRAGMA trusted_schema=ON;
             """
         )
+        return conn
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """the calling thread's connection"""
+        return self.pool.get()
+
+    def close(self):
+        """close all pooled connections"""
+        self.pool.close()
+
+    def data_version(self) -> int:
+        """sqlite's counter of commits made by other connections (e.g. other tills);
+        costs no table access, so caches can check it on every command"""
+        return self.conn.execute("PRAGMA data_version;").fetchone()[0]
+
+    def menu_version(self) -> int:
+        """counter bumped (by triggers) on every change to the menu table"""
+        return self.conn.execute("SELECT version FROM menu_version WHERE id=1;").fetchone()[0]
+
+    def _migrate(self) -> int:
+        """apply pending schema migrations once each; returns the version the db started at"""
+        start = version = self.conn.execute("PRAGMA user_version;").fetchone()[0]
+        while version < len(MIGRATIONS):
+            with self.transaction() as conn:
+                # re-read under the write lock, another till may have migrated first
+                version = conn.execute("PRAGMA user_version;").fetchone()[0]
+                if version < len(MIGRATIONS):
+                    conn.executescript(f"{MIGRATIONS[version]}\nPRAGMA user_version={version + 1};")
+                    version += 1
+        return start
+
+    def _begin_immediate(self, conn: sqlite3.Connection):
+        """take the write lock up front, retrying with backoff while another till holds it"""
+        for attempt in range(BUSY_RETRIES):
+            try:
+                conn.execute("BEGIN IMMEDIATE;")
+                return
+            except sqlite3.OperationalError as e:
+                if not is_busy_error(e) or attempt == BUSY_RETRIES - 1:
+                    raise
+                import random
+                time.sleep(BUSY_BACKOFF * 2 ** attempt * (1 + random.random()))
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """run a block atomically under the write lock (commit on success, roll back on
+        any error). nests as a savepoint when a transaction is already open"""
+        conn = self.conn
+        if conn.in_transaction:
+            conn.execute("SAVEPOINT nested;")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK TO nested;")
+                conn.execute("RELEASE nested;")
+                raise
+            conn.execute("RELEASE nested;")
+            return
+        self._begin_immediate(conn)
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK;")
+            raise
+        conn.execute("COMMIT;")
 
     def _seed_menu(self):
         """seed default pizzas once"""
         pizzas = [
-            ("Pepperoni", 21.00),
-            ("Chicken Supreme", 23.50),
-            ("BBQ Meatlovers", 25.50),
-            ("Veg Supreme", 22.50),
-            ("Hawaiian", 19.00),
-            ("Margherita", 18.50),
+            ("Pepperoni", 2100),
+            ("Chicken Supreme", 2350),
+            ("BBQ Meatlovers", 2550),
+            ("Veg Supreme", 2250),
+            ("Hawaiian", 1900),
+            ("Margherita", 1850),
         ]
         self.conn.executemany(
             """--sql
-            INSERT OR IGNORE INTO menu(name, price) VALUES(?, ?);
+            INSERT OR IGNORE INTO menu(name, price_cents) VALUES(?, ?);
             """,
             pizzas
         )
@@ -183,7 +1022,7 @@ class DatabaseManager:
 
     def reset_database(self):
         """danger: wipe everything; user must confirm"""
-        ans = input(colored("reset database? this deletes ALL data. (y/N): ", "red"))
+        ans = ask(colored("reset database? this deletes ALL data. (y/N): ", "red"))
         if not parse_boolean_input(ans):
             cprint("cancelled", "yellow")
             return
@@ -193,12 +1032,56 @@ class DatabaseManager:
             DROP TABLE IF EXISTS orders;
             DROP TABLE IF EXISTS menu;
             DROP TABLE IF EXISTS accounts;
-            DROP VIEW IF EXISTS order_totals;
+            DROP TABLE IF EXISTS order_totals;
+            DROP TABLE IF EXISTS pricing_state;
+            DROP TABLE IF EXISTS menu_version;
+            DROP VIEW IF EXISTS order_totals_live;
+            PRAGMA user_version=0;
             """
         )
         cprint("database cleared (restart program to reseed)", "green")
         sys.exit(0)
 
+    def _recompute_order_totals(self, conn: sqlite3.Connection):
+        """refill order_totals from the live view under the current pricing rules
+        (caller holds the write lock)"""
+        conn.execute("DELETE FROM order_totals;")
+        conn.execute("INSERT INTO order_totals SELECT * FROM order_totals_live;")
+        conn.execute(
+            "INSERT OR REPLACE INTO pricing_state(id, fingerprint) VALUES(1, ?);",
+            (PRICING.fingerprint,)
+        )
+
+    def _sync_pricing(self):
+        """rebuild order_totals if it was computed with different pricing rules
+        (e.g. a rate changed in code since the last run), so reports never mix rules"""
+        query = "SELECT fingerprint FROM pricing_state WHERE id=1;"
+        row = self.conn.execute(query).fetchone()
+        if row is not None and row[0] == PRICING.fingerprint:
+            return
+        with self.transaction() as conn:
+            # re-check under the write lock, another till may have rebuilt first
+            row = conn.execute(query).fetchone()
+            if row is None or row[0] != PRICING.fingerprint:
+                self._recompute_order_totals(conn)
+
+    def rebuild_order_totals(self):
+        """recompute the materialised order_totals table from scratch and verify it"""
+        count_drift = """--sql
+            SELECT COUNT(DISTINCT order_id) FROM (
+                SELECT * FROM (SELECT * FROM order_totals_live EXCEPT SELECT * FROM order_totals)
+                UNION ALL
+                SELECT * FROM (SELECT * FROM order_totals EXCEPT SELECT * FROM order_totals_live)
+            );
+            """
+        drift = self.conn.execute(count_drift).fetchone()[0]
+        with self.transaction() as conn:
+            self._recompute_order_totals(conn)
+        if self.conn.execute(count_drift).fetchone()[0]:
+            error("order totals still differ from the live view after rebuild"); return
+        rows = self.conn.execute("SELECT COUNT(*) FROM order_totals;").fetchone()[0]
+        cprint(f"rebuilt totals for {rows} orders ({drift} were out of date), matches live view", "green")
+
 # accounts/auth
 class AccountManager:
     """manage user accounts and session state (plain text passwords accepted because assignment)"""
@@ -209,21 +1092,39 @@ class AccountManager:
     def __init__(self, db: DatabaseManager):
         self.db = db
         self.current_user_id: int | None = None
+        self.current_username: str | None = None
+        self._privilege = 0
+        self._data_version: int | None = None
 
     @property
     def current_privilege(self) -> int:
-        """return privilege of current session user (0 if none)"""
+        """return privilege of current session user (0 if none). cached for the session;
+        only re-read when another connection (e.g. another till) has committed since"""
         if self.current_user_id is None:
             return 0
+        if self.db.data_version() != self._data_version:
+            self.refresh_session()
+        return self._privilege
+
+    def refresh_session(self, user_id: int | None = None):
+        """re-read the session user's identity + privilege. pass a user id to only
+        refresh when that user is the one logged in (e.g. after promote / demote)"""
+        if self.current_user_id is None or user_id not in (None, self.current_user_id):
+            return
+        self._data_version = self.db.data_version()
         row = self.db.conn.execute(
-            "SELECT privilege_level FROM accounts WHERE id=? LIMIT 1;",
+            "SELECT username, privilege_level FROM accounts WHERE id=? LIMIT 1;",
             (self.current_user_id,)
         ).fetchone()
-        return row["privilege_level"] if row else 0
+        self.current_username = row["username"] if row else None
+        self._privilege = row["privilege_level"] if row else 0
 
     def _reset_session(self):
-        """clear session user id"""
+        """clear session user + cached privilege"""
         self.current_user_id = None
+        self.current_username = None
+        self._privilege = 0
+        self._data_version = None
 
     def is_admin(self):
         """true if current user is admin"""
@@ -232,20 +1133,24 @@ class AccountManager:
     def require_admin(self):
         """guard for admin-only actions"""
         if self.current_user_id is None:
-            cprint("please login first", "red"); return False
+            error("please login first"); return False
         if not self.is_admin():
-            cprint("admin privileges required", "red"); return False
+            error("admin privileges required"); return False
         return True
 
     def _login(self, username: str, password: str) -> bool:
         """internal credential check"""
+        data_version = self.db.data_version()
         user = self.db.conn.execute(
-            "SELECT id, privilege_level FROM accounts WHERE username=? AND password=?;",
+            "SELECT id, username, privilege_level FROM accounts WHERE username=? AND password=?;",
             (username, password)
         ).fetchone()
         if not user:
             return False
         self.current_user_id = user["id"]
+        self.current_username = user["username"]
+        self._privilege = user["privilege_level"]
+        self._data_version = data_version
         level_name = AccountManager.PrivilegeLevel(user["privilege_level"]).name.lower()
         prefix = f"{level_name}: " if level_name != "user" else ""
         cprint(f"logged in as {prefix}{colored(username, 'green', attrs=['bold'])}", "green")
@@ -255,26 +1160,26 @@ class AccountManager:
         """interactive login (or non-interactive if args provided)"""
         if self.current_user_id is not None:
             cprint("already logged in", "yellow")
-            ans = input("log out first? (y/N): ")
+            ans = ask("log out first? (y/N): ")
             if parse_boolean_input(ans):
                 self.logout()
             else:
                 return
         if username and password:
             if not self._login(username, password):
-                cprint("invalid username or password", "red")
+                error("invalid username or password")
             return
         while True:
-            user = input(colored("username: ", "magenta")).strip()
-            pwd = input(colored("password: ", "magenta")).strip()
+            user = ask(colored("username: ", "magenta")).strip()
+            pwd = ask(colored("password: ", "magenta")).strip()
             if self._login(user, pwd):
                 break
-            cprint("invalid username or password", "red")
+            error("invalid username or password")
 
     def logout(self):
         """log out current user"""
         if self.current_user_id is None:
-            cprint("no user logged in", "red")
+            error("no user logged in")
             return
         cprint(f"logged out user #{self.current_user_id}", "green")
         self._reset_session()
@@ -286,112 +1191,216 @@ class AccountManager:
             (username,)
         ).fetchone() is not None
 
-    def register(self, username: str | None = None, password: str | None = None):
+    def register(self, username: str | None = None, password: str | None = None, admin: str | None = None):
         """create new account (admin can optionally grant admin)"""
         if username is None:
-            username = input(colored("choose a username: ", "magenta")).strip()
+            username = ask(colored("choose a username: ", "magenta")).strip()
         if password is None:
-            password = input(colored("choose a password: ", "magenta")).strip()
+            password = ask(colored("choose a password: ", "magenta")).strip()
         if not (3 <= len(username) <= 20) or not username.isalnum():
-            cprint("username must be 3-20 chars and alphanumeric", "red"); return
+            error("username must be 3-20 chars and alphanumeric"); return
         if len(password) < 4:
-            cprint("password too short (min 4)", "red"); return
+            error("password too short (min 4)"); return
         if self.user_exists(username):
-            cprint("username already taken", "red"); return
+            error("username already taken"); return
         level = AccountManager.PrivilegeLevel.USER
         if self.is_admin():
-            ans = input(f"set new user as admin? {colored('(dangerous)', 'red')} (y/N): ")
-            if parse_boolean_input(ans):
+            if admin is None:
+                admin = ask(f"set new user as admin? {colored('(dangerous)', 'red')} (y/N): ")
+            if parse_boolean_input(admin):
                 level = AccountManager.PrivilegeLevel.ADMIN
-        self.db.conn.execute(
-            "INSERT INTO accounts(username, password, privilege_level) VALUES(?,?,?);",
-            (username, password, level.value)
-        )
+        with self.db.transaction() as conn:
+            conn.execute(
+                "INSERT INTO accounts(username, password, privilege_level) VALUES(?,?,?);",
+                (username, password, level.value)
+            )
         cprint("account created", "green")
 
     def register_or_login(self, username: str | None = None, password: str | None = None):
         """prompt user to pick register / login"""
-        ans = input(f"would you like to ({colored('r','light_blue')})egister or ({colored('l','light_blue')})ogin?: ").strip().lower()
+        ans = ask(f"would you like to ({colored('r','light_blue')})egister or ({colored('l','light_blue')})ogin?: ").strip().lower()
         if ans == "r":
             self.register(username, password)
         elif ans == "l":
             self.login(username, password)
         else:
-            cprint("invalid option", "red")
+            error("invalid option")
 
     def whoami(self):
         """print current user identity"""
         if self.current_user_id is None:
-            cprint("no user currently logged in", "red"); return
-        user = self.db.conn.execute(
-            "SELECT username, privilege_level FROM accounts WHERE id=?;",
-            (self.current_user_id,)
-        ).fetchone()
-        if not user:
-            cprint("error fetching user info", "red"); return
-        level = AccountManager.PrivilegeLevel(user["privilege_level"]).name.lower()
+            error("no user currently logged in"); return
+        privilege = self.current_privilege
+        if self.current_username is None:
+            error("error fetching user info"); return
+        level = AccountManager.PrivilegeLevel(privilege).name.lower()
         prefix = f"{level}: " if level != "user" else ""
-        cprint(f"you are logged in as {prefix}{colored(user['username'], 'green', attrs=['bold'])}", "green")
+        cprint(f"you are logged in as {prefix}{colored(self.current_username, 'green', attrs=['bold'])}", "green")
 
 # domain models
 class OrderItem(ABC):
     """abstract orderable item type"""
+    __slots__ = ()
     @property
     @abstractmethod
     def name(self) -> str: ...
     @property
     @abstractmethod
-    def price(self) -> float: ...
+    def price(self) -> int: ...  # cents
 
-@dataclass
+@dataclass(slots=True)
 class Pizza(OrderItem):
     """pizza model"""
     _name: str
-    _price: float
+    _price: int  # cents
+    id: int | None = None  # menu row id
     @property
     def name(self) -> str: return self._name
     @property
-    def price(self) -> float: return self._price
+    def price(self) -> int: return self._price
 
 class ServiceType(Enum):
     """pickup or delivery"""
     PICKUP = 0
     DELIVERY = 1
 
-@dataclass
+@dataclass(slots=True)
 class Order:
-    """in-memory order representation (db-backed)"""
+    """in-memory order representation (db-backed). lines are kept compactly in one
+    int array of (menu id, quantity) pairs and resolved through the shared catalog,
+    so no per-unit (or per-order) item objects are created"""
     id: int
-    items: list[OrderItem]
     service_type: ServiceType
     has_loyalty_card: bool
-    is_discounted: bool = False
+    is_discounted: bool = False  # as recorded at payment
     paid: bool = False
+    menu: "MenuCatalog | None" = field(default=None, repr=False, compare=False)
+    # 64-bit like sqlite's INTEGER, so any id / quantity the db holds fits
+    _lines: array = field(default_factory=lambda: array("q"), init=False, repr=False)
+    # running sum of item prices; change lines through add_item / remove_item
+    _base_cents: int = field(default=0, init=False, repr=False)
+
+    @property
+    def lines(self) -> Iterator[tuple[OrderItem, int]]:
+        """(item, quantity) per distinct menu item, in the order first added"""
+        ids = self._lines[0::2]
+        return zip(map(self.menu.get_by_id, ids), self._lines[1::2])
+
+    @property
+    def items(self) -> list[OrderItem]:
+        """one entry per unit (a fresh list; change the order via add_item / remove_item)"""
+        return [item for item, qty in self.lines for _ in range(qty)]
+
+    def _line_index(self, item: OrderItem) -> int | None:
+        """position of the item's id in _lines (its quantity follows it)"""
+        for i in range(0, len(self._lines), 2):
+            if self._lines[i] == item.id:
+                return i
+        return None
+
+    def add_item(self, item: OrderItem, quantity: int = 1):
+        """add `quantity` units of an item"""
+        i = self._line_index(item)
+        if i is None:
+            self._lines.extend((item.id, quantity))
+        else:
+            self._lines[i + 1] += quantity
+        self._base_cents += item.price * quantity
+
+    def remove_item(self, item: OrderItem, quantity: int) -> int:
+        """drop up to `quantity` units of an item; returns how many went"""
+        i = self._line_index(item)
+        if i is None:
+            return 0
+        removed = min(quantity, self._lines[i + 1])
+        if removed == self._lines[i + 1]:
+            del self._lines[i:i + 2]
+        else:
+            self._lines[i + 1] -= removed
+        self._base_cents -= item.price * removed
+        return removed
+
+    def reprice(self, item: OrderItem, old_price: int):
+        """adjust the running total after a menu item's price changed in place"""
+        i = self._line_index(item)
+        if i is not None:
+            self._base_cents += (item.price - old_price) * self._lines[i + 1]
+
+    @property
+    def raw_cost(self) -> int:
+        """sum of item prices in cents"""
+        return self._base_cents
 
     @property
-    def raw_cost(self):
-        """sum of item prices"""
-        return sum(i.price for i in self.items)
+    def discount_applies(self) -> bool:
+        """whether the pricing rules give this order the discount right now"""
+        return PRICING.discount_applies(self._base_cents, self.has_loyalty_card)
 
     @property
-    def total_cost(self):
-        """compute final total including discount, delivery fee, gst"""
-        base = self.raw_cost
-        cost = base
-        if base > DISCOUNT_THRESHOLD or self.has_loyalty_card:
-            self.is_discounted = True
-            cost = base * (1 - DISCOUNT_RATE)
-        if self.service_type is ServiceType.DELIVERY:
-            cost += DELIVERY_FEE
-        return cost * (1 + GST_RATE)
-
-# global menu cache
-menu: list[OrderItem] = []
-
-def reload_menu(order_manager: "OrderManager"):
-    """reload global menu cache from db"""
-    global menu
-    menu = [Pizza(r["name"], r["price"]) for r in order_manager.fetch_menu()]
+    def total_cost(self) -> int:
+        """final total in cents including discount, delivery fee, gst"""
+        return PRICING.total_cents(self._base_cents, self.discount_applies,
+                                   self.service_type is ServiceType.DELIVERY)
+
+# menu cache
+class MenuCatalog:
+    """in-memory menu indexed by casefolded name and by db id. orders share these
+    instances, so a price change here is seen by every order holding the item"""
+    def __init__(self):
+        self._by_id: dict[int, Pizza] = {}
+        self._by_name: dict[str, Pizza] = {}
+
+    def __iter__(self) -> Iterator[Pizza]:
+        return iter(self._by_id.values())
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def load(self, rows: Iterable[sqlite3.Row]):
+        """replace the whole catalog with menu rows (id, name, price_cents)"""
+        self._by_id.clear()
+        self._by_name.clear()
+        for r in rows:
+            self.add(Pizza(r["name"], r["price_cents"], r["id"]))
+
+    def sync(self, rows: Iterable[sqlite3.Row]) -> list[tuple[Pizza, int]]:
+        """bring the catalog in line with menu rows, keeping the existing instances
+        (orders share them); returns (item, old price) for every repriced item"""
+        repriced = []
+        seen = set()
+        for r in rows:
+            seen.add(r["id"])
+            item = self._by_id.get(r["id"])
+            if item is None:
+                self.add(Pizza(r["name"], r["price_cents"], r["id"]))
+            elif item.price != r["price_cents"]:
+                repriced.append((item, item.price))
+                self.update_price(item, r["price_cents"])
+        for item in [i for i in self if i.id not in seen]:
+            self.remove(item)
+        return repriced
+
+    def get(self, name: str) -> Pizza | None:
+        """case-insensitive lookup by name"""
+        return self._by_name.get(name.strip().casefold())
+
+    def get_by_id(self, item_id: int) -> Pizza | None:
+        """lookup by menu row id"""
+        return self._by_id.get(item_id)
+
+    def add(self, item: Pizza):
+        """index a new item"""
+        self._by_id[item.id] = item
+        self._by_name[item.name.casefold()] = item
+
+    def update_price(self, item: Pizza, price: int):
+        """reprice an item (cents) in place"""
+        item._price = price
+
+    def remove(self, item: Pizza):
+        """drop an item from both indexes"""
+        self._by_id.pop(item.id, None)
+        self._by_name.pop(item.name.casefold(), None)
 
 # order management
 class OrderManager:
@@ -399,66 +1408,193 @@ class OrderManager:
     def __init__(self, db: DatabaseManager, account_manager: AccountManager):
         self.db = db
         self.account_manager = account_manager
-        self.orders: list[Order] = []
-        self.current_order_id: int | None = None
-        reload_menu(self)
-        self._refresh_orders()
+        # order state belongs to whoever is logged in; orders are read as they're used
+        self._session_user: int | None = None
+        self._orders: dict[int, Order] = {}
+        self._current_order_id: int | None = None
+        self.menu = MenuCatalog()
+        with startup_phase("menu load"):
+            self._data_version: int | None = self.db.data_version()
+            self._menu_version: int | None = self.db.menu_version()
+            self.menu.load(self.fetch_menu())
 
     # internal loading
-    def _refresh_orders(self):
-        """refresh in-memory order list"""
-        self.orders.clear()
-        for row in self._query_orders():
-            items = [Pizza(r["name"], r["price"]) for r in self.fetch_items_for_order(row["id"])]
-            self.orders.append(
-                Order(
-                    id=row["id"],
-                    items=items,
-                    service_type=ServiceType(row["service_type"]),
-                    has_loyalty_card=bool(row["has_loyalty_card"]),
-                    is_discounted=bool(row["is_discounted"]),
-                    paid=bool(row["paid"])
-                )
-            )
+    def _sync_session(self):
+        """forget cached orders + the selected order if the session user has changed"""
+        user_id = self.account_manager.current_user_id
+        if user_id != self._session_user:
+            self._session_user = user_id
+            self._orders = {}
+            self._current_order_id = None
 
-    def _query_orders(self, paid_only: bool = False) -> Sequence[sqlite3.Row]:
-        """get order rows filtered by user / paid status"""
-        paid_clause = "AND paid=1" if paid_only else ""
-        if self.account_manager.is_admin():
-            return self.db.conn.execute(
-                f"SELECT id, customer_id, service_type, has_loyalty_card, is_discounted, paid FROM orders WHERE 1=1 {paid_clause} ORDER BY id;"
-            ).fetchall()
-        uid = self.account_manager.current_user_id
-        return self.db.conn.execute(
-            f"SELECT id, customer_id, service_type, has_loyalty_card, is_discounted, paid FROM orders WHERE customer_id=? {paid_clause} ORDER BY id;",
-            (uid,)
+    @property
+    def orders(self) -> dict[int, Order]:
+        """id-keyed cache of the orders this session has created, listed or selected.
+        a till's whole history is never loaded, only what it touches"""
+        self._sync_session()
+        return self._orders
+
+    @property
+    def current_order_id(self) -> int | None:
+        """the selected order, if it was selected by the current session user"""
+        self._sync_session()
+        return self._current_order_id
+
+    @current_order_id.setter
+    def current_order_id(self, order_id: int | None):
+        self._sync_session()
+        self._current_order_id = order_id
+
+    def sync_menu(self, force: bool = False):
+        """re-read the menu if it changed since it was loaded (prices, new or deleted
+        items); cached orders share the items, so their totals follow. data_version
+        says whether anyone else committed at all, menu_version whether it was the menu"""
+        data_version = self.db.data_version()
+        if data_version == self._data_version and not force:
+            return
+        self._data_version = data_version
+        menu_version = self.db.menu_version()
+        if menu_version == self._menu_version and not force:
+            return
+        self._menu_version = menu_version
+        for item, old_price in self.menu.sync(self.fetch_menu()):
+            for order in self._orders.values():
+                order.reprice(item, old_price)
+
+    def _menu_item(self, item_id: int) -> Pizza:
+        """catalog item by id; an id this till hasn't seen means another till added it"""
+        item = self.menu.get_by_id(item_id)
+        if item is None:
+            self.sync_menu(force=True)
+            item = self.menu.get_by_id(item_id)
+        return item
+
+    def _cache_order(self, row: sqlite3.Row) -> Order:
+        """build an (item-less) order from its db row and store it in the id-keyed cache"""
+        order = Order(
+            id=row["id"],
+            service_type=ServiceType(row["service_type"]),
+            has_loyalty_card=bool(row["has_loyalty_card"]),
+            is_discounted=bool(row["is_discounted"]),
+            paid=bool(row["paid"]),
+            menu=self.menu
+        )
+        self._orders[order.id] = order
+        return order
+
+    def _load_orders(self, rows: Sequence[sqlite3.Row]) -> list[Order]:
+        """orders for the given rows (in row order), reusing cached ones and
+        fetching items for the rest with a single query"""
+        cache = self.orders
+        missing = [r["id"] for r in rows if r["id"] not in cache]
+        for r in rows:
+            if r["id"] not in cache:
+                self._cache_order(r)
+        if missing:
+            get_item = self._menu_item
+            marks = ",".join("?" * len(missing))
+            for order_id, menu_item_id, quantity in self.db.conn.execute(
+                f"SELECT order_id, menu_item_id, quantity FROM order_items WHERE order_id IN ({marks}) ORDER BY id;",
+                missing
+            ):
+                cache[order_id].add_item(get_item(menu_item_id), quantity)
+        return [cache[r["id"]] for r in rows]
+
+    def _order_filters(self, words: Sequence[str]) -> tuple[list[str], list, int | None, list[str]] | None:
+        """turn order list filter words into where clauses + params, the keyset start
+        (before <id>) and the words minus that start; none after reporting an error"""
+        clauses, params, dates, kept = [], [], [], []
+        before = None
+        if not self.account_manager.is_admin():
+            clauses.append("customer_id=?")
+            params.append(self.account_manager.current_user_id)
+        words = iter(words)
+        for word in words:
+            w = word.lower()
+            if w in ("paid", "unpaid"):
+                clauses.append("paid=?")
+                params.append(int(w == "paid"))
+            elif w == "mine":
+                if self.account_manager.is_admin():
+                    clauses.append("customer_id=?")
+                    params.append(self.account_manager.current_user_id)
+            elif w == "before":
+                before = safe_int(next(words, ""), minimum=1)
+                if before is None:
+                    error("before needs an order id"); return None
+                continue
+            else:
+                try:
+                    date.fromisoformat(word)
+                except ValueError:
+                    error(f"unknown filter '{word}' (use paid, unpaid, mine, a YYYY-MM-DD date or before <id>)")
+                    return None
+                dates.append(word)
+            kept.append(word)
+        if len(dates) > 2:
+            error("give at most two dates (a start and an end)"); return None
+        if dates:
+            span = self._date_range(dates[0], dates[1] if len(dates) > 1 else None)
+            if span is None:
+                return None
+            clauses.append("created_at >= datetime(?, 'utc') AND created_at < datetime(?, '+1 day', 'utc')")
+            params += [span[0].isoformat(), span[1].isoformat()]
+        return clauses, params, before, kept
+
+    def _fetch_order_page(self, clauses: list[str], params: list, before: int | None) -> tuple[list[Order], bool]:
+        """one page of orders, newest first, starting below `before` (keyset on id);
+        also says whether more follow. items are loaded for this page only"""
+        if before is not None:
+            clauses = [*clauses, "id < ?"]
+            params = [*params, before]
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self.db.conn.execute(
+            f"""--sql
+            SELECT id, customer_id, service_type, has_loyalty_card, is_discounted, paid
+            FROM orders {where}
+            ORDER BY id DESC
+            LIMIT ?;
+            """,
+            (*params, ORDER_PAGE_SIZE + 1)
         ).fetchall()
+        return self._load_orders(rows[:ORDER_PAGE_SIZE]), len(rows) > ORDER_PAGE_SIZE
+
+    def first_order_page(self) -> list[Order]:
+        """the page a bare `order list` shows first (start-up profile + benchmarks)"""
+        clauses, params, before, _ = self._order_filters(())
+        return self._fetch_order_page(clauses, params, before)[0]
+
+    def _has_visible_orders(self) -> bool:
+        """whether there is any order this session could switch to"""
+        if self.account_manager.is_admin():
+            row = self.db.conn.execute("SELECT EXISTS(SELECT 1 FROM orders);").fetchone()
+        else:
+            row = self.db.conn.execute(
+                "SELECT EXISTS(SELECT 1 FROM orders WHERE customer_id=?);",
+                (self.account_manager.current_user_id,)
+            ).fetchone()
+        return bool(row[0])
 
     # menu queries
     def fetch_menu(self):
         """return menu rows"""
-        return self.db.conn.execute("SELECT name, price FROM menu ORDER BY id;").fetchall()
-
-    def get_menu_item(self, name: str):
-        """lookup a menu item by case-insensitive name"""
-        return self.db.conn.execute(
-            "SELECT id, name, price FROM menu WHERE lower(name)=lower(?);",
-            (name,)
-        ).fetchone()
+        return self.db.conn.execute("SELECT id, name, price_cents FROM menu ORDER BY id;").fetchall()
 
     # order db ops
     def insert_order(self, service_type: int, has_loyalty: bool) -> int:
         """create new order record"""
         customer_id = self.account_manager.current_user_id
-        cur = self.db.conn.execute(
-            "INSERT INTO orders(customer_id, service_type, has_loyalty_card) VALUES(?,?,?);",
-            (customer_id, service_type, int(has_loyalty))
-        )
+        with self.db.transaction() as conn:
+            cur = conn.execute(
+                "INSERT INTO orders(customer_id, service_type, has_loyalty_card) VALUES(?,?,?);",
+                (customer_id, service_type, int(has_loyalty))
+            )
         return cur.lastrowid
 
     def delete_order(self, order_id: int):
         """delete order by id"""
-        self.db.conn.execute("DELETE FROM orders WHERE id=?;", (order_id,))
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM orders WHERE id=?;", (order_id,))
 
     def fetch_order_by_id(self, order_id: int):
         """get order row"""
@@ -467,147 +1603,175 @@ class OrderManager:
             (order_id,)
         ).fetchone()
 
-    def fetch_items_for_order(self, order_id: int):
-        """get item rows for order"""
-        return self.db.conn.execute(
-            """--sql
-            SELECT menu.name, menu.price
-            FROM order_items
-            JOIN menu ON menu.id = order_items.menu_item_id
-            WHERE order_items.order_id=?
-            ORDER BY order_items.id;
-            """,
-            (order_id,)
-        ).fetchall()
-
-    def update_paid_and_discount(self, order_id: int, paid: bool, discounted: bool):
-        """update paid + discount flags"""
-        self.db.conn.execute(
-            "UPDATE orders SET paid=?, is_discounted=? WHERE id=?;",
-            (int(paid), int(discounted), order_id)
-        )
+    def update_paid_and_discount(self, order_id: int, paid: bool, discounted: bool) -> bool:
+        """update paid + discount flags; false if the order is gone or was already paid
+        (e.g. by another till)"""
+        with self.db.transaction() as conn:
+            cur = conn.execute(
+                "UPDATE orders SET paid=?, is_discounted=? WHERE id=? AND paid=0;",
+                (int(paid), int(discounted), order_id)
+            )
+        return cur.rowcount > 0
 
     # item helpers
-    def _db_add_order_item(self, order_id: int, menu_name: str):
-        """add a single menu item to order (db only)"""
-        menu_row = self.get_menu_item(menu_name)
-        if not (self.fetch_order_by_id(order_id) and menu_row):
+    def _db_add_order_items(self, order_id: int, lines: Sequence[tuple[Pizza, int]]) -> bool:
+        """add (menu item, quantity) lines to an order in one transaction (db only).
+        the order is validated once; nothing is written unless every line is"""
+        try:
+            with self.db.transaction() as conn:
+                if not self.fetch_order_by_id(order_id):
+                    return False
+                params = [(order_id, item.id, quantity) for item, quantity in lines]
+                conn.executemany(
+                    """--sql
+                    INSERT INTO order_items(order_id, menu_item_id, quantity) VALUES(?,?,?)
+                    ON CONFLICT(order_id, menu_item_id) DO UPDATE SET quantity = quantity + excluded.quantity;
+                    """,
+                    params
+                )
+        except sqlite3.Error as e:
+            if is_busy_error(e):
+                raise  # the parser turns this into "database is busy, please try again"
             return False
-        self.db.conn.execute(
-            "INSERT INTO order_items(order_id, menu_item_id) VALUES(?,?);",
-            (order_id, menu_row["id"])
-        )
         return True
 
-    def _db_remove_order_item(self, order_id: int, menu_name: str):
-        """remove one instance of item from order (db only)"""
-        menu_row = self.get_menu_item(menu_name)
-        if not (self.fetch_order_by_id(order_id) and menu_row):
-            return False
-        self.db.conn.execute(
-            """--sql
-            DELETE FROM order_items
-            WHERE rowid IN (
-                SELECT rowid FROM order_items
-                WHERE order_id=? AND menu_item_id=?
-                LIMIT 1
-            );
-            """,
-            (order_id, menu_row["id"])
-        )
-        return True
+    def _db_remove_order_item(self, order_id: int, item: Pizza, quantity: int = 1) -> int:
+        """remove up to quantity of a menu item from order (db only); returns how many were removed"""
+        with self.db.transaction() as conn:
+            if not self.fetch_order_by_id(order_id):
+                return 0
+            cur = conn.execute(
+                "UPDATE order_items SET quantity = quantity - ? WHERE order_id=? AND menu_item_id=? AND quantity > ?;",
+                (quantity, order_id, item.id, quantity)
+            )
+            if cur.rowcount:
+                return quantity
+            # removing everything that's left: drop the line and report what it held
+            rows = conn.execute(
+                "DELETE FROM order_items WHERE order_id=? AND menu_item_id=? RETURNING quantity;",
+                (order_id, item.id)
+            ).fetchall()
+            return rows[0]["quantity"] if rows else 0
 
     # order selection
-    def _get_order(self, oid: int | None):
-        """return order object by id or none"""
-        return next((o for o in self.orders if o.id == oid), None)
+    def _get_order(self, oid: int | None) -> Order | None:
+        """order by id from the cache, else read on demand if this session may see it"""
+        if oid is None:
+            return None
+        order = self.orders.get(oid)
+        if order is None:
+            row = self.fetch_order_by_id(oid)
+            if row and (self.account_manager.is_admin()
+                        or row["customer_id"] == self.account_manager.current_user_id):
+                order = self._load_orders([row])[0]
+        return order
 
     def _ensure_current_order(self):
         """ensure a mutable current order is selected (prompt user if not)"""
         order = self._get_order(self.current_order_id)
         if order is None:
             cprint("no current order selected", "yellow")
-            if self.orders:
-                ans = input("select an order? (y/N): ")
+            if self._has_visible_orders():
+                ans = ask("select an order? (y/N): ")
                 if parse_boolean_input(ans):
                     self.switch_order()
             else:
-                ans = input("create an order? (y/N): ")
+                ans = ask("create an order? (y/N): ")
                 if parse_boolean_input(ans):
                     self.create_order()
             return None
         if order.paid:
             cprint("order already paid", "yellow")
-            ans = input("switch to another? (y/N): ")
+            ans = ask("switch to another? (y/N): ")
             if parse_boolean_input(ans):
                 self.switch_order()
             return None
         return order
 
     # public actions
-    def list_orders(self):
-        """list visible orders"""
-        if not self.orders:
-            cprint("no orders found", "red"); return
-        for o in self.orders:
-            self.print_order(o)
+    def list_orders(self, *filters: str) -> int:
+        """page through visible orders, newest first. filters: paid / unpaid, mine,
+        one or two dates (YYYY-MM-DD), before <id>. returns how many were shown"""
+        parsed = self._order_filters(filters)
+        if parsed is None:
+            return 0
+        self.sync_menu()
+        clauses, params, before, words = parsed
+        shown = 0
+        while True:
+            page, more = self._fetch_order_page(clauses, params, before)
+            for o in page:
+                self.print_order(o)
+            shown += len(page)
+            if not more:
+                break
+            before = page[-1].id
+            if not _interactive:
+                cprint(f"more orders: order list {' '.join([*words, 'before', str(before)])}", "yellow")
+                break
+            if not parse_boolean_input(ask("show more? (y/N): ")):
+                break
+        if not shown:
+            cprint("no orders found", "yellow")
+        return shown
 
     def print_order(self, order: Order):
         """print single order summary"""
         cprint(f"order #{order.id} ({order.service_type.name.lower()}):", "green")
-        print("\titems:", ", ".join(i.name for i in order.items) or "none")
+        print("\titems:", ", ".join(f"{qty} x {item.name}" for item, qty in order.lines) or "none")
         print("\tservice type:", order.service_type.name)
-        print("\ttotal cost:", f"${order.total_cost:.2f}")
+        print("\ttotal cost:", format_money(order.total_cost))
         print("\tpaid:", "yes" if order.paid else "no")
 
-    def create_order(self, type: str | None = None):
+    def create_order(self, type: str | None = None, loyalty: str | None = None):
         """create and select a new order"""
         if type is None:
-            type = input("order type? (pickup/delivery): ").strip().lower()
+            type = ask("order type? (pickup/delivery): ").strip().lower()
         try:
             service_type = ServiceType[type.upper()]
         except KeyError:
-            cprint("invalid service type", "red"); return
-        ans = input("does customer have a loyalty card? (y/N): ")
-        has_loyalty = parse_boolean_input(ans)
+            error("invalid service type"); return
+        if loyalty is None:
+            loyalty = ask("does customer have a loyalty card? (y/N): ")
+        has_loyalty = parse_boolean_input(loyalty)
         oid = self.insert_order(service_type.value, has_loyalty)
-        self._refresh_orders()
+        self.orders[oid] = Order(id=oid, service_type=service_type, has_loyalty_card=has_loyalty, menu=self.menu)
         self.current_order_id = oid
         cprint(f"order #{oid} created", "green")
 
-    def remove_order(self):
+    def remove_order(self, order_id: str | None = None):
         """remove an order by id (own or any if admin)"""
-        self.list_orders()
-        if not self.orders:
-            return
-        raw = input("enter order id to remove: ").strip()
-        oid = safe_int(raw, minimum=1)
+        if order_id is None:
+            if not self.list_orders():
+                return
+            order_id = ask("enter order id to remove: ").strip()
+        oid = safe_int(order_id, minimum=1)
         if oid is None:
-            cprint("invalid order id", "red"); return
+            error("invalid order id"); return
         order = self._get_order(oid)
         if not order:
-            cprint("order not found", "red"); return
+            error("order not found"); return
         if not self.account_manager.is_admin():
             row = self.fetch_order_by_id(oid)
             if row and row["customer_id"] != self.account_manager.current_user_id:
-                cprint("cannot remove another user's order", "red"); return
+                error("cannot remove another user's order"); return
         self.delete_order(oid)
         if self.current_order_id == oid:
             self.current_order_id = None
-        self._refresh_orders()
+        self.orders.pop(oid, None)
         cprint(f"order #{oid} removed", "green")
 
-    def switch_order(self):
+    def switch_order(self, order_id: str | None = None):
         """switch active order id"""
-        self.list_orders()
-        if not self.orders:
-            return
-        raw = input("enter order id to switch: ").strip()
-        oid = safe_int(raw, minimum=1)
+        if order_id is None:
+            if not self.list_orders():
+                return
+            order_id = ask("enter order id to switch: ").strip()
+        oid = safe_int(order_id, minimum=1)
         if oid is None:
-            cprint("invalid id", "red"); return
+            error("invalid id"); return
         if not self._get_order(oid):
-            cprint("order not found", "red"); return
+            error("order not found"); return
         if self.current_order_id == oid:
             cprint("already current order", "yellow"); return
         self.current_order_id = oid
@@ -616,98 +1780,129 @@ class OrderManager:
     def add_order_item(self, item: str | None = None, quantity: str | None = "1"):
         """add menu item(s) to current order"""
         if item is None:
-            item = input("menu item to add: ").strip().lower()
-        chosen = next((m for m in menu if m.name.lower() == item.lower()), None)
+            item = ask("menu item to add: ").strip().lower()
+        self.sync_menu()
+        chosen = self.menu.get(item)
         if chosen is None:
-            cprint("invalid menu item", "red"); return
+            error("invalid menu item"); return
         qty = safe_int(quantity or "1", minimum=1)
         if qty is None:
-            raw = input("enter quantity (>=1): ")
+            raw = ask("enter quantity (>=1): ")
             qty = safe_int(raw, minimum=1)
             if qty is None:
-                cprint("invalid quantity", "red"); return
+                error("invalid quantity"); return
         if qty > MAX_BATCH_ITEM_ADD:
-            cprint(f"max quantity {MAX_BATCH_ITEM_ADD} at a time", "red"); return
+            error(f"max quantity {MAX_BATCH_ITEM_ADD} at a time"); return
         order = self._ensure_current_order()
         if not order:
             return
-        for _ in range(qty):
-            if not self._db_add_order_item(order.id, chosen.name):
-                cprint("db failure adding item", "red"); return
-            order.items.append(chosen)
+        if not self._db_add_order_items(order.id, [(chosen, qty)]):
+            error("db failure adding item"); return
+        order.add_item(chosen, qty)
         cprint(f"added {qty} x {chosen.name} to order #{order.id}", "green")
 
-    def remove_order_item(self):
+    def remove_order_item(self, item: str | None = None, quantity: str | None = None):
         """remove one or more instances of a menu item from current order"""
         order = self._ensure_current_order()
         if not order:
             return
-        name = input("menu item to remove: ").strip().lower()
-        chosen = next((m for m in menu if m.name.lower() == name), None)
+        if item is None:
+            item = ask("menu item to remove: ").strip().lower()
+        self.sync_menu()
+        chosen = self.menu.get(item)
         if chosen is None:
-            cprint("invalid menu item", "red"); return
-        qraw = input("how many to remove?: ").strip()
-        qty = safe_int(qraw, minimum=1)
+            error("invalid menu item"); return
+        if quantity is None:
+            quantity = ask("how many to remove?: ").strip()
+        qty = safe_int(quantity, minimum=1)
         if qty is None:
-            cprint("invalid quantity", "red"); return
-        removed = 0
-        for _ in range(qty):
-            if self._db_remove_order_item(order.id, chosen.name):
-                for i, itm in enumerate(order.items):
-                    if itm.name == chosen.name:
-                        del order.items[i]
-                        removed += 1
-                        break
+            error("invalid quantity"); return
+        removed = self._db_remove_order_item(order.id, chosen, qty)
         if removed:
+            order.remove_item(chosen, removed)
             cprint(f"removed {removed} x {chosen.name}", "green")
         else:
-            cprint("item not found in order", "red")
+            error("item not found in order")
 
-    def process_order(self):
+    def process_order(self, pay: str | None = None):
         """finalise and pay current order"""
+        self.sync_menu()
         order = self._ensure_current_order()
         if not order:
             return
         if order.paid:
-            cprint("order already paid", "red"); return
+            error("order already paid"); return
         total = order.total_cost
+        discounted = order.discount_applies
         extras = []
-        if order.is_discounted:
-            extras.append("5% discount")
+        if discounted:
+            extras.append(f"{PRICING.discount_percent}% discount")
         if order.service_type is ServiceType.DELIVERY:
-            extras.append(f"{color_money(DELIVERY_FEE)} delivery")
-        extras.append(f"{int(GST_RATE*100)}% gst")
+            extras.append(f"{color_money(PRICING.delivery_fee_cents)} delivery")
+        extras.append(f"{PRICING.gst_percent}% gst")
         extras_str = ", including " + " and ".join(extras)
         print(f"total for order #{order.id} is {color_money(total)}{extras_str}.")
-        ans = input("pay now? (y/N): ")
-        if parse_boolean_input(ans):
+        if pay is None:
+            pay = ask("pay now? (y/N): ")
+        if parse_boolean_input(pay):
+            # another till may have repriced an item while we waited for an answer
+            self.sync_menu()
+            if order.total_cost != total:
+                error(f"prices changed on another till, the total is now {format_money(order.total_cost)}; "
+                      "process the order again"); return
+            if not self.update_paid_and_discount(order.id, True, discounted):
+                error("order was already paid or removed on another till"); return
             order.paid = True
-            self.update_paid_and_discount(order.id, True, order.is_discounted)
+            order.is_discounted = discounted
             cprint("payment successful", "green")
         else:
             cprint("payment cancelled", "yellow")
 
-    def generate_daily_sales_summary(self):
-        """print paid orders and aggregate total (user-scoped unless admin)"""
-        rows = self._query_orders(paid_only=True)
-        if not rows:
-            cprint("no sales", "red"); return
-        total = 0.0
-        for row in rows:
-            items = [Pizza(r["name"], r["price"]) for r in self.fetch_items_for_order(row["id"])]
-            temp = Order(
-                id=row["id"],
-                items=items,
-                service_type=ServiceType(row["service_type"]),
-                has_loyalty_card=bool(row["has_loyalty_card"]),
-                is_discounted=bool(row["is_discounted"]),
-                paid=True
-            )
-            amt = temp.total_cost
-            total += amt
-            owner = f" (user #{row['customer_id']})" if self.account_manager.is_admin() else ""
-            print(f"order #{temp.id}{owner}: {color_money(amt)}")
-        cprint(f"total sales: {color_money(total)}", "green")
+    def generate_daily_sales_summary(self, start: str | None = None, end: str | None = None):
+        """print paid orders between two local dates (default today) and their total
+        (user-scoped unless admin), streamed row by row and totalled as they go"""
+        span = self._date_range(start, end)
+        if span is None:
+            return
+        first, last = span
+        admin = self.account_manager.is_admin()
+        # created_at is utc, so convert the local day bounds rather than every row
+        sql = """--sql
+            SELECT order_id, customer_id, final_cents
+            FROM order_totals
+            WHERE paid=1
+              AND created_at >= datetime(?, 'utc')
+              AND created_at < datetime(?, '+1 day', 'utc')
+            """
+        params: tuple = (first.isoformat(), last.isoformat())
+        if not admin:
+            sql += " AND customer_id=?"
+            params += (self.account_manager.current_user_id,)
+        # index order, so rows stream straight off the index with no sort or buffering;
+        # cents are exact integers, so the running total needs no sql aggregate
+        sql += " ORDER BY created_at, order_id;"
+        span = first.isoformat() if first == last else f"{first.isoformat()} to {last.isoformat()}"
+        count = total = 0
+        for row in self.db.conn.execute(sql, params):
+            owner = f" (user #{row['customer_id']})" if admin else ""
+            print(f"order #{row['order_id']}{owner}: {color_money(row['final_cents'])}")
+            count += 1
+            total += row["final_cents"]
+        if not count:
+            cprint(f"no sales for {span}", "yellow"); return
+        cprint(f"total sales for {span}: {count} orders, {color_money(total)}", "green")
+
+    @staticmethod
+    def _date_range(start: str | None, end: str | None) -> tuple[date, date] | None:
+        """parse YYYY-MM-DD bounds (start defaults to today, end to start); none on bad input"""
+        try:
+            first = date.fromisoformat(start) if start else date.today()
+            last = date.fromisoformat(end) if end else first
+        except ValueError:
+            error("invalid date (use YYYY-MM-DD)"); return None
+        if last < first:
+            error("end date is before start date"); return None
+        return first, last
 
     # admin reports
     def admin_report_revenue_by_user(self):
@@ -717,18 +1912,17 @@ class OrderManager:
         rows = self.db.conn.execute(
             """--sql
             SELECT COALESCE(a.username,'guest') AS username,
-                   COUNT(o.id) AS order_count,
-                   SUM(ot.final_total) AS total_revenue
+                   COUNT(ot.order_id) AS order_count,
+                   SUM(ot.final_cents) AS total_revenue
             FROM order_totals ot
-            JOIN orders o ON o.id = ot.order_id
-            LEFT JOIN accounts a ON a.id = o.customer_id
-            WHERE o.paid = 1
-            GROUP BY o.customer_id
+            LEFT JOIN accounts a ON a.id = ot.customer_id
+            WHERE ot.paid = 1
+            GROUP BY ot.customer_id
             ORDER BY total_revenue DESC;
             """
         ).fetchall()
         if not rows:
-            cprint("no data", "red"); return
+            cprint("no data", "yellow"); return
         cprint("revenue by user", "green", attrs=["bold"])
         for r in rows:
             print(f"{r['username']}: {r['order_count']} orders -> {color_money(r['total_revenue'])}")
@@ -739,7 +1933,7 @@ class OrderManager:
             return
         rows = self.db.conn.execute(
             """--sql
-            SELECT m.name, COUNT(oi.id) AS times_ordered, ROUND(SUM(m.price),2) AS revenue
+            SELECT m.name, SUM(oi.quantity) AS times_ordered, SUM(m.price_cents * oi.quantity) AS revenue
             FROM order_items oi
             JOIN menu m ON m.id = oi.menu_item_id
             JOIN orders o ON o.id = oi.order_id
@@ -750,7 +1944,7 @@ class OrderManager:
             """
         ).fetchall()
         if not rows:
-            cprint("no data", "red"); return
+            cprint("no data", "yellow"); return
         cprint("top menu items", "green", attrs=["bold"])
         for r in rows:
             print(f"{r['name']}: {r['times_ordered']} sold -> {color_money(r['revenue'])}")
@@ -761,9 +1955,9 @@ class OrderManager:
             return
         r = self.db.conn.execute(
             """--sql
-            SELECT ROUND(AVG(final_total),2) AS avg_value,
-                   ROUND(MIN(final_total),2) AS min_value,
-                   ROUND(MAX(final_total),2) AS max_value,
+            SELECT CAST(ROUND(AVG(final_cents)) AS INTEGER) AS avg_value,
+                   MIN(final_cents) AS min_value,
+                   MAX(final_cents) AS max_value,
                    COUNT(*) AS paid_orders
             FROM order_totals
             WHERE paid=1;
@@ -788,11 +1982,334 @@ class OrderManager:
             """
         ).fetchone()
         if not r or r["total"] == 0:
-            cprint("no orders", "red"); return
+            cprint("no orders", "yellow"); return
         pct = (r["discounted"] / r["total"]) * 100
         cprint("discount usage", "green", attrs=["bold"])
         print(f"{r['discounted']} / {r['total']} orders ({pct:.1f}%) received a discount")
 
+    def admin_check_totals(self):
+        """compare every cached order's running totals with order_totals in the db"""
+        if not self.account_manager.require_admin():
+            return
+        self.sync_menu()
+        cache = self.orders
+        unseen = set(cache)
+        mismatched = []
+        stale = []
+        # only the cached orders' rows, a bounded IN list at a time
+        for ids in batched(list(cache), CHECK_TOTALS_BATCH):
+            marks = ",".join("?" * len(ids))
+            for r in self.db.conn.execute(
+                f"SELECT order_id, base_cents, final_cents FROM order_totals WHERE order_id IN ({marks});",
+                ids
+            ):
+                order = cache[r["order_id"]]
+                unseen.discard(order.id)
+                if (order.raw_cost, order.total_cost) != (r["base_cents"], r["final_cents"]):
+                    stale.append(order.id)
+                    mismatched.append(f"order #{order.id}: cached {format_money(order.total_cost)}, "
+                                      f"db {format_money(r['final_cents'])}")
+        mismatched.extend(f"order #{oid}: cached but not in the db" for oid in sorted(unseen))
+        if mismatched:
+            for line in mismatched[:10]:
+                print(line)
+            error(f"{len(mismatched)} of {len(cache)} cached orders disagree with the db "
+                  "(another till may have changed them; dropped from the cache, so they "
+                  "are read again when next used)")
+            for oid in (*stale, *unseen):
+                del cache[oid]
+            return
+        cprint(f"all {len(cache)} cached orders match the db", "green")
+
+    # admin bulk export
+    EXPORT_QUERIES = {
+        "orders": """--sql
+            SELECT o.id, o.customer_id, o.service_type, o.has_loyalty_card,
+                   o.is_discounted, o.paid, o.created_at
+            FROM orders o
+            {where}
+            ORDER BY o.id;
+            """,
+        "items": """--sql
+            SELECT oi.order_id, oi.menu_item_id, m.name AS item, oi.quantity
+            FROM order_items oi
+            JOIN orders o ON o.id = oi.order_id
+            LEFT JOIN menu m ON m.id = oi.menu_item_id
+            {where}
+            ORDER BY oi.order_id, oi.menu_item_id;
+            """,
+        "totals": """--sql
+            SELECT o.*
+            FROM order_totals o
+            {where}
+            ORDER BY o.order_id;
+            """,
+    }
+
+    def admin_export(self, table: str | None = None, target: str | None = None,
+                     start: str | None = None, end: str | None = None):
+        """stream orders / items / totals (optionally between two local dates) to a
+        csv / jsonl file, or to the screen when target is just 'csv' or 'jsonl'"""
+        import csv, json
+        if not self.account_manager.require_admin():
+            return
+        if table is None:
+            table = ask("export which (orders/items/totals): ").strip().lower()
+        if table not in self.EXPORT_QUERIES:
+            error("can only export orders, items or totals"); return
+        if target is None:
+            target = ask("file to write (or csv / jsonl for the screen): ").strip()
+        to_screen = target.lower() in ("csv", "jsonl")
+        fmt = target.lower() if to_screen else os.path.splitext(target)[1].lstrip(".").lower()
+        if fmt not in ("csv", "jsonl"):
+            error("unknown format (use a .csv or .jsonl file)"); return
+        where, params = "", ()
+        if start or end:
+            span = self._date_range(start, end)
+            if span is None:
+                return
+            # same local-day -> utc bounds as the order summary
+            where = "WHERE o.created_at >= datetime(?, 'utc') AND o.created_at < datetime(?, '+1 day', 'utc')"
+            params = (span[0].isoformat(), span[1].isoformat())
+        # a single select reads one snapshot, so a long export never sees a half-written order.
+        # it runs before the file is opened, so a failed query leaves no empty file behind
+        cursor = self.db.conn.execute(self.EXPORT_QUERIES[table].format(where=where), params)
+        cursor.arraysize = EXPORT_FETCH_ROWS
+        columns = [d[0] for d in cursor.description]
+        try:
+            out = nullcontext(sys.stdout) if to_screen else open(target, "w", newline="", encoding="utf-8")
+        except OSError as e:
+            cursor.close()
+            error(f"cannot write {target}: {e.strerror}"); return
+        written = 0
+        with out as f:
+            if fmt == "csv":
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                while rows := cursor.fetchmany():
+                    writer.writerows(rows)
+                    written += len(rows)
+            else:
+                while rows := cursor.fetchmany():
+                    f.writelines(json.dumps(dict(zip(columns, r))) + "\n" for r in rows)
+                    written += len(rows)
+        if not to_screen:
+            cprint(f"exported {written} {table} rows to {target}", "green")
+
+    # admin bulk import
+    def admin_import(self, path: str | None = None, format: str | None = None):
+        """stream orders from a csv / jsonl file into the db in chunked transactions.
+        bad orders go to <path>.rejects.jsonl instead of stopping the import"""
+        import csv, json
+        if not self.account_manager.require_admin():
+            return
+        if path is None:
+            path = ask("file to import: ").strip()
+        fmt = (format or os.path.splitext(path)[1].lstrip(".")).lower()
+        if fmt not in ("csv", "jsonl"):
+            error("unknown format (use csv or jsonl)"); return
+        try:
+            source = open(path, newline="", encoding="utf-8")
+        except OSError as e:
+            error(f"cannot open {path}: {e.strerror}"); return
+        # one lookup table each for the whole import; menu names come from the catalog
+        customers = {
+            r["username"].casefold(): r["id"]
+            for r in self.db.conn.execute("SELECT id, username FROM accounts;")
+        }
+        reject_path = f"{path}.rejects.jsonl"
+        rejects = None
+        imported = item_lines = rejected = 0
+        started = time.perf_counter()
+        with source:
+            try:
+                records = self._read_import_csv(source) if fmt == "csv" else self._read_import_jsonl(source)
+            except UnicodeDecodeError:
+                error(f"cannot import {path}: {self._undecodable(path)}"); return
+            except ValueError as e:
+                error(f"cannot import {path}: {e}"); return
+            try:
+                while True:
+                    consumed = 0
+                    chunk: list[tuple[tuple, list[tuple[int, int]]]] = []
+                    try:
+                        pulled = list(islice(records, IMPORT_CHUNK_ORDERS))
+                    except (UnicodeDecodeError, csv.Error) as e:
+                        # earlier chunks are already committed; say so rather than crash
+                        reason = self._undecodable(path) if isinstance(e, UnicodeDecodeError) else e
+                        print("\r", end="")
+                        error(f"cannot import {path}: {reason}; {imported} orders already imported, "
+                              f"the rest of the file was not")
+                        return
+                    for line_no, record in pulled:
+                        consumed += 1
+                        try:
+                            chunk.append(self._parse_import_record(record, customers))
+                        except (ValueError, TypeError, AttributeError) as e:
+                            # a field of the wrong type (e.g. a number for customer) is the
+                            # record's fault, so it is rejected like any other bad value
+                            rejected += 1
+                            if rejects is None:
+                                rejects = open(reject_path, "w", encoding="utf-8")
+                            rejects.write(json.dumps({"line": line_no, "error": str(e), "record": record}) + "\n")
+                    if chunk:
+                        self._write_import_chunk(chunk)
+                        imported += len(chunk)
+                        item_lines += sum(len(lines) for _, lines in chunk)
+                    done = imported + rejected
+                    if consumed < IMPORT_CHUNK_ORDERS:
+                        break
+                    if done % IMPORT_PROGRESS_EVERY < IMPORT_CHUNK_ORDERS:
+                        print(f"\r{done} orders read...", end="", flush=True)
+            finally:
+                if rejects is not None:
+                    rejects.close()
+        elapsed = time.perf_counter() - started
+        print("\r", end="")
+        cprint(f"imported {imported} orders ({item_lines} item lines) in {elapsed:.2f}s", "green")
+        if rejected:
+            cprint(f"{rejected} orders rejected, see {reject_path}", "yellow")
+
+    @staticmethod
+    def _undecodable(path: str) -> str:
+        """'line N: not utf-8 text' for the first line of path that doesn't decode"""
+        with open(path, "rb") as f:
+            for line_no, raw in enumerate(f, start=1):
+                try:
+                    raw.decode("utf-8")
+                except UnicodeDecodeError:
+                    return f"line {line_no}: not utf-8 text (save the file as utf-8)"
+        return "not utf-8 text (save the file as utf-8)"
+
+    @staticmethod
+    def _read_import_csv(source: Iterable[str]) -> Iterator[tuple[int, dict]]:
+        """(line, order record) from csv with one row per order line. consecutive rows
+        sharing an order_ref make up one order; raises ValueError without that column"""
+        import csv
+        reader = csv.DictReader(source)
+        if "order_ref" not in (reader.fieldnames or ()):
+            raise ValueError("csv needs an order_ref column (one value per order)")
+        return OrderManager._group_csv_rows(reader)
+
+    @staticmethod
+    def _group_csv_rows(reader) -> Iterator[tuple[int, dict]]:
+        """yield one record per run of rows with the same order_ref. a row with a blank
+        ref is yielded on its own (and rejected), never merged into its neighbours"""
+        import csv
+        record: dict | None = None
+        line_no = 0
+        try:
+            for row in reader:
+                ref = (row.get("order_ref") or "").strip()
+                if record is None or not ref or ref != record["order_ref"]:
+                    if record is not None:
+                        yield line_no, record
+                    line_no = reader.line_num
+                    record = {"order_ref": ref} | {k: row.get(k) for k in (
+                        "customer", "service_type", "has_loyalty_card", "paid", "created_at"
+                    )}
+                    record["items"] = []
+                record["items"].append({"name": row.get("item"), "quantity": row.get("quantity")})
+        except csv.Error as e:
+            # DictReader only updates its own line_num after a good row
+            raise csv.Error(f"line {reader.reader.line_num}: {e}") from None
+        if record is not None:
+            yield line_no, record
+
+    @staticmethod
+    def _read_import_jsonl(source: Iterable[str]) -> Iterator[tuple[int, dict | str]]:
+        """yield (line, order record) from jsonl with one order object per line"""
+        import json
+        for line_no, line in enumerate(source, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError:
+                yield line_no, line.rstrip("\n")
+
+    def _parse_import_record(self, record: dict | str, customers: dict[str, int]):
+        """validate one order record; returns (order row values, [(menu id, qty)]) or raises ValueError"""
+        if not isinstance(record, dict):
+            raise ValueError("not a json object")
+        if record.get("order_ref") == "":
+            raise ValueError("blank order_ref")
+        customer = str(record.get("customer") or "").strip()
+        customer_id = None
+        if customer:
+            customer_id = customers.get(customer.casefold())
+            if customer_id is None:
+                raise ValueError(f"unknown customer '{customer}'")
+        try:
+            service_type = ServiceType[str(record.get("service_type", "")).strip().upper()]
+        except KeyError:
+            raise ValueError("service_type must be pickup or delivery") from None
+        loyalty = parse_flag(record.get("has_loyalty_card", ""))
+        paid = parse_flag(record.get("paid", ""))
+        if loyalty is None or paid is None:
+            raise ValueError("has_loyalty_card / paid must be yes or no")
+        created_at = record.get("created_at") or None
+        if created_at is not None:
+            try:
+                # stored as utc like CURRENT_TIMESTAMP; a time without an offset is local
+                stamp = datetime.fromisoformat(str(created_at).strip()).astimezone(timezone.utc)
+                created_at = stamp.strftime("%Y-%m-%d %H:%M:%S")
+            except ValueError:
+                raise ValueError(f"bad created_at '{created_at}'") from None
+        items = record.get("items")
+        if not isinstance(items, list) or not items:
+            raise ValueError("order has no items")
+        lines = []
+        base = 0
+        for entry in items:
+            name = entry.get("name") if isinstance(entry, dict) else None
+            item = self.menu.get(name) if isinstance(name, str) else None
+            if item is None:
+                raise ValueError(f"unknown menu item '{name}'")
+            qty = safe_int(str(entry.get("quantity", 1)), minimum=1)
+            if qty is None or qty > MAX_BATCH_ITEM_ADD:
+                raise ValueError(f"bad quantity for '{name}' (1-{MAX_BATCH_ITEM_ADD})")
+            lines.append((item.id, qty))
+            base += item.price * qty
+        discounted = paid and PRICING.discount_applies(base, loyalty)
+        return (customer_id, service_type.value, int(loyalty), int(discounted), int(paid), created_at), lines
+
+    def _write_import_chunk(self, chunk: list[tuple[tuple, list[tuple[int, int]]]]):
+        """insert a chunk of parsed orders + their items with two executemany calls"""
+        conn = self.db.conn
+        # a batch script already runs the whole command in one savepoint; a nested one
+        # per chunk would make sqlite re-journal every index page the chunk touches
+        with nullcontext() if conn.in_transaction else self.db.transaction():
+            # ids are handed out here (under the write lock) so items can reference them
+            # without a round trip per order; honour autoincrement's never-reuse rule
+            next_id = conn.execute(
+                """--sql
+                SELECT MAX(
+                    COALESCE((SELECT seq FROM sqlite_sequence WHERE name='orders'), 0),
+                    COALESCE((SELECT MAX(id) FROM orders), 0)
+                ) + 1;
+                """
+            ).fetchone()[0]
+            order_rows = []
+            item_rows = []
+            for oid, (values, lines) in enumerate(chunk, start=next_id):
+                order_rows.append((oid, *values))
+                item_rows.extend((oid, menu_id, qty) for menu_id, qty in lines)
+            conn.executemany(
+                """--sql
+                INSERT INTO orders(id, customer_id, service_type, has_loyalty_card, is_discounted, paid, created_at)
+                VALUES(?,?,?,?,?,?,COALESCE(?, CURRENT_TIMESTAMP));
+                """,
+                order_rows
+            )
+            conn.executemany(
+                """--sql
+                INSERT INTO order_items(order_id, menu_item_id, quantity) VALUES(?,?,?)
+                ON CONFLICT(order_id, menu_item_id) DO UPDATE SET quantity = quantity + excluded.quantity;
+                """,
+                item_rows
+            )
+
     # admin account/menu management
     def admin_list_accounts(self):
         """list all accounts"""
@@ -814,7 +2331,7 @@ class OrderManager:
             "SELECT id, username, privilege_level FROM accounts ORDER BY id;"
         ).fetchall()
         if not rows:
-            cprint("no accounts found", "red"); return
+            error("no accounts found"); return
 
         def do_promote(target_id: int):
             r = self.db.conn.execute(
@@ -822,19 +2339,21 @@ class OrderManager:
                 (target_id,)
             ).fetchone()
             if not r:
-                cprint("user not found", "red"); return
+                error("user not found"); return
             if r["privilege_level"] == 1:
                 cprint("already admin", "yellow"); return
-            self.db.conn.execute(
-                "UPDATE accounts SET privilege_level=1 WHERE id=?;",
-                (target_id,)
-            )
+            with self.db.transaction() as conn:
+                conn.execute(
+                    "UPDATE accounts SET privilege_level=1 WHERE id=?;",
+                    (target_id,)
+                )
+            self.account_manager.refresh_session(target_id)
             cprint(f"promoted #{target_id} ({r['username']})", "green")
 
         # if id supplied directly
         if user_id:
             if not user_id.isdigit():
-                cprint("invalid id", "red"); return
+                error("invalid id"); return
             do_promote(int(user_id))
             return
 
@@ -845,11 +2364,11 @@ class OrderManager:
             cprint("no non-admin users to promote", "yellow"); return
         for r in non_admins:
             print(f"#{r['id']}: {r['username']}")
-        raw = input("enter user id (blank to cancel): ").strip()
+        raw = ask("enter user id (blank to cancel): ").strip()
         if not raw:
             cprint("cancelled", "yellow"); return
         if not raw.isdigit():
-            cprint("invalid id", "red"); return
+            error("invalid id"); return
         do_promote(int(raw))
 
     def admin_demote(self, user_id: str | None = None):
@@ -871,21 +2390,23 @@ class OrderManager:
                 (target_id,)
             ).fetchone()
             if not r:
-                cprint("user not found", "red"); return
+                error("user not found"); return
             if r["privilege_level"] == 0:
                 cprint("user is not an admin", "yellow"); return
             if target_id == current_admin_id and len(admins) == 1:
-                cprint("refusing to demote last admin (yourself)", "red"); return
-            self.db.conn.execute(
-                "UPDATE accounts SET privilege_level=0 WHERE id=?;",
-                (target_id,)
-            )
+                error("refusing to demote last admin (yourself)"); return
+            with self.db.transaction() as conn:
+                conn.execute(
+                    "UPDATE accounts SET privilege_level=0 WHERE id=?;",
+                    (target_id,)
+                )
+            self.account_manager.refresh_session(target_id)
             cprint(f"demoted #{target_id} ({r['username']})", "green")
 
         # direct id path
         if user_id:
             if not user_id.isdigit():
-                cprint("invalid id", "red"); return
+                error("invalid id"); return
             do_demote(int(user_id))
             return
 
@@ -894,11 +2415,11 @@ class OrderManager:
         for r in admins:
             tag = "(you)" if r["id"] == current_admin_id else ""
             print(f"#{r['id']}: {r['username']} {tag}")
-        raw = input("enter admin id (blank to cancel): ").strip()
+        raw = ask("enter admin id (blank to cancel): ").strip()
         if not raw:
             cprint("cancelled", "yellow"); return
         if not raw.isdigit():
-            cprint("invalid id", "red"); return
+            error("invalid id"); return
         do_demote(int(raw))
 
     def admin_menu_add(self, name: str | None = None, price: str | None = None):
@@ -906,139 +2427,262 @@ class OrderManager:
         if not self.account_manager.require_admin():
             return
         if name is None:
-            name = input("menu item name: ").strip()
+            name = ask("menu item name: ").strip()
         if price is None:
-            price = input("price: ").strip()
+            price = ask("price: ").strip()
+        p = parse_money(price)
+        if p is None or p <= 0:
+            error(f"invalid price (up to {format_money(MAX_MONEY_CENTS)})"); return
+        self.sync_menu()
+        if self.menu.get(name):
+            error("menu item already exists"); return
         try:
-            p = float(price)
-            if p <= 0: raise ValueError
-        except Exception:
-            cprint("invalid price", "red"); return
-        try:
-            self.db.conn.execute("INSERT INTO menu(name, price) VALUES(?,?);", (name, p))
-            reload_menu(self)
+            with self.db.transaction() as conn:
+                cur = conn.execute("INSERT INTO menu(name, price_cents) VALUES(?,?);", (name, p))
+            self.menu.add(Pizza(name, p, cur.lastrowid))
             cprint("menu item added", "green")
         except Exception as e:
-            cprint(f"failed: {e}", "red")
+            error(f"failed: {e}")
 
     def admin_menu_update_price(self, name: str | None = None, price: str | None = None):
         """update price of a menu item"""
         if not self.account_manager.require_admin():
             return
         if name is None:
-            name = input("menu item name: ").strip()
+            name = ask("menu item name: ").strip()
         if price is None:
-            price = input("new price: ").strip()
-        try:
-            p = float(price)
-            if p <= 0: raise ValueError
-        except Exception:
-            cprint("invalid price", "red"); return
-        cur = self.db.conn.execute(
-            "UPDATE menu SET price=? WHERE lower(name)=lower(?);",
-            (p, name)
-        )
+            price = ask("new price: ").strip()
+        p = parse_money(price)
+        if p is None or p <= 0:
+            error(f"invalid price (up to {format_money(MAX_MONEY_CENTS)})"); return
+        self.sync_menu()
+        item = self.menu.get(name)
+        if item is None:
+            error("not found"); return
+        with self.db.transaction() as conn:
+            cur = conn.execute("UPDATE menu SET price_cents=? WHERE id=?;", (p, item.id))
         if cur.rowcount:
-            reload_menu(self)
+            old_price = item.price
+            self.menu.update_price(item, p)
+            # cached orders share the item instance; keep their running totals in step
+            for order in self._orders.values():
+                order.reprice(item, old_price)
             cprint("updated", "green")
         else:
-            cprint("not found", "red")
+            # deleted on another till since we loaded the menu
+            self.menu.remove(item)
+            error("not found")
 
     def admin_menu_delete(self, name: str | None = None):
         """delete a menu item"""
         if not self.account_manager.require_admin():
             return
         if name is None:
-            name = input("menu item name: ").strip()
-        cur = self.db.conn.execute(
-            "DELETE FROM menu WHERE lower(name) LIKE lower(?);",
-            (name,)
-        )
-        if cur.rowcount:
-            reload_menu(self)
-            cprint("deleted", "green")
-        else:
-            cprint("not found", "red")
+            name = ask("menu item name: ").strip()
+        self.sync_menu()
+        item = self.menu.get(name)
+        if item is None:
+            error("not found"); return
+        try:
+            with self.db.transaction() as conn:
+                conn.execute("DELETE FROM menu WHERE id=?;", (item.id,))
+        except sqlite3.IntegrityError:
+            error("cannot delete: item is on existing orders"); return
+        self.menu.remove(item)
+        cprint("deleted", "green")
+
+# profiling (opt-in with --profile / --profile-out, or one command with admin debug profile)
+class ProfilerBusyError(Exception):
+    """cProfile couldn't start: another profiler / debugger already holds the hook"""
+
+class CommandProfiler:
+    """one cProfile profile per command name, added to on every run of that command"""
+    TOP_FUNCTIONS = 25
+
+    def __init__(self):
+        self.enabled = False
+        self.out_dir: str | None = None
+        self.profiles: dict[str, "cProfile.Profile"] = {}
+        self.runs: dict[str, int] = {}
+        self._active: "cProfile.Profile | None" = None
+
+    def enable(self, out_dir: str | None = None):
+        """profile every command from now on; report (or write .pstats files to out_dir) at exit"""
+        self.enabled = True
+        self.out_dir = out_dir
+        atexit.register(self.dump)
+
+    def command(self, name: str):
+        """context that profiles the block under command name (unless a profile is already running)"""
+        if not self.enabled or self._active is not None:
+            return nullcontext()
+        import cProfile
+        self.runs[name] = self.runs.get(name, 0) + 1
+        return self.running(self.profiles.setdefault(name, cProfile.Profile()))
+
+    @contextmanager
+    def running(self, profile: "cProfile.Profile | None"):
+        """run the block under profile (or unprofiled with None), pausing whichever
+        profile was running"""
+        outer = self._active
+        if outer is not None:
+            outer.disable()
+        self._active = profile
+        try:
+            if profile is None:
+                yield
+                return
+            try:
+                profile.enable()
+            except ValueError as e:
+                raise ProfilerBusyError(str(e)) from None
+            try:
+                yield
+            finally:
+                profile.disable()
+        finally:
+            self._active = outer
+            if outer is not None:
+                outer.enable()
+
+    def print_stats(self, title: str, profile: "cProfile.Profile"):
+        """print the functions profile spent the most (cumulative) time in"""
+        import pstats
+        cprint(f"\nprofile: {title}", None, attrs=["bold"])
+        stats = pstats.Stats(profile, stream=sys.stdout)
+        stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.TOP_FUNCTIONS)
+
+    def dump(self):
+        """at exit: print each command's profile, or write them to out_dir as <command>.pstats"""
+        if not self.profiles:
+            return
+        if self.out_dir:
+            os.makedirs(self.out_dir, exist_ok=True)
+            for name, profile in self.profiles.items():
+                profile.dump_stats(os.path.join(self.out_dir, name.replace(" ", "_") + ".pstats"))
+            cprint(f"profiles for {len(self.profiles)} command(s) written to {self.out_dir}", "green")
+            return
+        for name, profile in self.profiles.items():
+            self.print_stats(f"{name} ({self.runs[name]} run{'s' if self.runs[name] != 1 else ''})", profile)
+
+PROFILER = CommandProfiler()
 
 # command infrastructure
 class Command:
-    """bind a command name to a function"""
+    """bind a command name to a function. arity + help text are worked out once here,
+    so running a command needs no reflection"""
     def __init__(self, name: str, function: Callable, description: str,
                  privilege_level: AccountManager.PrivilegeLevel | None = AccountManager.PrivilegeLevel.USER):
         self.name = name
+        self.tokens = tuple(name.split())
         self._fn = function
         self.description = description
         self.privilege_level = privilege_level
+        # read the code object directly: importing inspect alone costs ~20ms of start-up
+        code = getattr(function, "__func__", function).__code__
+        bound = 1 if hasattr(function, "__self__") else 0
+        positional = code.co_varnames[bound:code.co_argcount]
+        variadic = bool(code.co_flags & 0x04)  # CO_VARARGS
+        self.min_args = len(positional) - len(function.__defaults__ or ())
+        self.max_args: int | None = None if variadic else len(positional)
+        usage = [f"<{n}>" if i < self.min_args else f"[{n}]" for i, n in enumerate(positional)]
+        if variadic:
+            usage.append("[...]")
+        self.help_line = f"{colored(name, 'blue')} {colored(' '.join(usage), 'cyan')}".strip()
 
     def execute(self, tokens: list[str]):
         """validate arg count and invoke function"""
-        sig = inspect.signature(self._fn)
-        params = list(sig.parameters.values())
-        required = sum(
-            p.default == inspect._empty and p.kind in (
-                inspect.Parameter.POSITIONAL_OR_KEYWORD,
-                inspect.Parameter.POSITIONAL_ONLY
-            )
-            for p in params
-        )
-        if not (required <= len(tokens) <= len(params)):
-            cprint(f"invalid args for '{self.name}' (expected {required}-{len(params)}, got {len(tokens)})", "red")
+        if len(tokens) < self.min_args or (self.max_args is not None and len(tokens) > self.max_args):
+            expected = f"{self.min_args}-{self.max_args}" if self.max_args is not None else f"{self.min_args}+"
+            error(f"invalid args for '{self.name}' (expected {expected}, got {len(tokens)})")
             return
         return self._fn(*tokens)
 
+class CommandTrie:
+    """commands indexed token by token, for longest-prefix lookup in O(tokens)"""
+    def __init__(self):
+        self.children: dict[str, CommandTrie] = {}
+        self.command: Command | None = None
+
+    def insert(self, command: Command):
+        """add command under its name tokens (a later command with the same name wins)"""
+        node = self
+        for token in command.tokens:
+            node = node.children.setdefault(token, CommandTrie())
+        node.command = command
+
+    def match(self, tokens: Sequence[str]) -> tuple[Command | None, int]:
+        """longest registered command prefixing tokens, plus how many tokens it used"""
+        node, best, used = self, None, 0
+        for depth, token in enumerate(tokens, start=1):
+            node = node.children.get(token)
+            if node is None:
+                break
+            if node.command is not None:
+                best, used = node.command, depth
+        return best, used
+
 class CommandParser:
     """simple repl parser"""
     def __init__(self, account_manager: AccountManager):
         self.account_manager = account_manager
-        self.commands: list[Command] = [
+        self.commands: list[Command] = []  # registration order, for help
+        self._trie = CommandTrie()
+        self.register(
             Command("help", self.show_help, "show this help", None),
             Command("h", self.show_help, "alias help", None),
             Command("quit", self.quit, "exit program", None),
             Command("exit", lambda: cprint("use quit to exit", "yellow"), "alias quit", None),
-        ]
+        )
+
+    def register(self, *commands: Command):
+        """make commands available to the parser"""
+        for cmd in commands:
+            self.commands.append(cmd)
+            self._trie.insert(cmd)
 
     def parse_and_execute(self, input_str: str):
         """parse the raw input string and attempt to execute a command"""
-        tokens = input_str.strip().split()
+        try:
+            tokens = shlex.split(input_str)
+        except ValueError as e:
+            error(f"could not parse command: {e}"); return
         if not tokens:
             return
-        for cmd in self.commands:
-            parts = cmd.name.split()
-            if tokens[:len(parts)] != parts:
-                continue
-            if cmd.privilege_level is not None and self.account_manager.current_user_id is None:
-                cprint("please login/register first", "yellow")
-                self.account_manager.register_or_login()
-                print("\n")
-            if cmd.privilege_level is not None and self.account_manager.current_user_id is None:
-                cprint("authentication required", "red"); return
-            if (cmd.privilege_level == AccountManager.PrivilegeLevel.ADMIN
-                and not self.account_manager.is_admin()):
-                cprint("insufficient privileges", "red"); return
-            args = tokens[len(parts):]
-            return cmd.execute(args)
-        cprint("unknown command. type 'help'", "red")
+        cmd, used = self._trie.match(tokens)
+        if cmd is None:
+            error("unknown command. type 'help'"); return
+        if cmd.privilege_level is not None and self.account_manager.current_user_id is None:
+            cprint("please login/register first", "yellow")
+            self.account_manager.register_or_login()
+            print("\n")
+        if cmd.privilege_level is not None and self.account_manager.current_user_id is None:
+            error("authentication required"); return
+        if (cmd.privilege_level == AccountManager.PrivilegeLevel.ADMIN
+            and not self.account_manager.is_admin()):
+            error("insufficient privileges"); return
+        try:
+            with SQL_TRACER.command(cmd.name), PROFILER.command(cmd.name):
+                return cmd.execute(tokens[used:])
+        except sqlite3.OperationalError as e:
+            if not is_busy_error(e):
+                raise
+            error("database is busy (another till is writing), please try again")
 
     def show_help(self):
         """display help with all available command names and descriptions"""
         cprint("available commands:", "green", attrs=["bold"])
         width = max(len(c.name) for c in self.commands)
+        admin = self.account_manager.is_admin()
         for cmd in self.commands:
-            if (cmd.privilege_level == AccountManager.PrivilegeLevel.ADMIN
-                and not self.account_manager.is_admin()):
+            if cmd.privilege_level == AccountManager.PrivilegeLevel.ADMIN and not admin:
                 continue
-            sig = inspect.signature(cmd._fn)
-            params = " ".join(
-                f"<{p}>" if prm.default == inspect._empty else f"[{p}]"
-                for p, prm in sig.parameters.items()
-            )
-            line = f"{colored(cmd.name,'blue')} {colored(params,'cyan')}".strip()
-            print(line.ljust(width + 25), "-", cmd.description)
+            print(cmd.help_line.ljust(width + 25), "-", cmd.description)
 
     @staticmethod
     def quit():
         """interactive quit confirmation"""
-        ans = input(colored("are you sure you want to quit? (y/N): ", "yellow"))
+        ans = ask(colored("are you sure you want to quit? (y/N): ", "yellow"))
         if parse_boolean_input(ans):
             cprint("okay, see ya!", "green")
             sys.exit(0)
@@ -1055,35 +2699,90 @@ class CommandParser:
             if user_input:
                 self.parse_and_execute(user_input)
 
+class BatchRunner:
+    """run commands from a script with no prompts, in one transaction (or chunks of one)"""
+    def __init__(self, parser: CommandParser, db: DatabaseManager,
+                 chunk_size: int | None = None, quiet: bool = False):
+        self.parser = parser
+        self.db = db
+        self.chunk_size = chunk_size
+        self.quiet = quiet
+        self.succeeded = 0
+        self.failed = 0
+
+    def run(self, lines: Iterable[str], first_line: int = 1) -> int:
+        """execute every non-blank, non-# line and print a summary; returns the failure count"""
+        set_interactive(False)
+        commands = (
+            (number, line.strip()) for number, line in enumerate(lines, start=first_line)
+            if line.strip() and not line.lstrip().startswith("#")
+        )
+        started = time.perf_counter()
+        while True:
+            chunk = list(islice(commands, self.chunk_size)) if self.chunk_size else commands
+            ran = 0
+            with self.db.transaction():
+                for number, line in chunk:
+                    self._run_one(number, line)
+                    ran += 1
+            if not self.chunk_size or ran < self.chunk_size:
+                break
+        elapsed = time.perf_counter() - started
+        total = self.succeeded + self.failed
+        rate = total / elapsed if elapsed else 0.0
+        cprint(f"batch: {total} commands, {self.succeeded} ok, {self.failed} failed "
+               f"in {elapsed:.3f}s ({rate:.0f} commands/s)", "red" if self.failed else "green")
+        return self.failed
+
+    def _run_one(self, number: int, line: str):
+        """run one command inside a savepoint so a crash only undoes that command"""
+        errors_before = _errors_reported
+        reason = None
+        try:
+            with self.db.transaction(), (redirect_stdout(io.StringIO()) if self.quiet else nullcontext()):
+                self.parser.parse_and_execute(line)
+        except Exception as e:
+            reason = str(e) or type(e).__name__
+        else:
+            if _errors_reported != errors_before:
+                reason = _last_error
+        if reason is None:
+            self.succeeded += 1
+            if not self.quiet:
+                cprint(f"ok   line {number}: {line}", "green")
+        else:
+            self.failed += 1
+            cprint(f"FAIL line {number}: {line} -> {reason}", "red")
+
 # application wiring
 class Application:
-    """bootstrap objects & start repl"""
-    def __init__(self, *args: str):
-        self.db = DatabaseManager()
-        atexit.register(lambda: self.db.conn.close() if self.db.conn else None)
+    """bootstrap objects + commands; run() starts the repl (or a batch script)"""
+    def __init__(self, storage: StorageProfile = STORAGE_PROFILES[DEFAULT_STORAGE_PROFILE]):
+        self.db = DatabaseManager(storage)
+        atexit.register(self.db.close)
         self.account_manager = AccountManager(self.db)
         self.order_manager = OrderManager(self.db, self.account_manager)
-        parser = CommandParser(self.account_manager)
+        self.parser = parser = CommandParser(self.account_manager)
 
         # user commands
-        parser.commands += [
+        parser.register(
             Command("menu", self.show_menu, "show menu"),
             Command("order create", self.order_manager.create_order, "create order"),
             Command("order remove", self.order_manager.remove_order, "remove order"),
-            Command("order list", self.order_manager.list_orders, "list orders"),
+            Command("order list", self.order_manager.list_orders, "list orders (filters: paid/unpaid, mine, date [date], before <id>)"),
             Command("order process", self.order_manager.process_order, "pay current order"),
             Command("order switch", self.order_manager.switch_order, "switch current order"),
             Command("order item add", self.order_manager.add_order_item, "add item"),
             Command("order item remove", self.order_manager.remove_order_item, "remove item"),
-            Command("order summary", self.order_manager.generate_daily_sales_summary, "sales summary"),
+            Command("order summary", self.order_manager.generate_daily_sales_summary, "sales summary for a day or date range"),
             Command("account whoami", self.account_manager.whoami, "current user", None),
             Command("account login", self.account_manager.login, "login", None),
             Command("account logout", self.account_manager.logout, "logout", None),
             Command("account register", self.account_manager.register, "register", None),
-        ]
+        )
 
         # admin commands
-        parser.commands += [
+        parser.register(
             Command("admin accounts list", self.order_manager.admin_list_accounts, "list accounts", AccountManager.PrivilegeLevel.ADMIN),
             Command("admin accounts promote", self.order_manager.admin_promote, "promote user", AccountManager.PrivilegeLevel.ADMIN),
             Command("admin accounts demote", self.order_manager.admin_demote, "demote user", AccountManager.PrivilegeLevel.ADMIN),
@@ -1094,8 +2793,35 @@ class Application:
             Command("admin report top-items", self.order_manager.admin_report_top_menu_items, "top items", AccountManager.PrivilegeLevel.ADMIN),
             Command("admin report stats", self.order_manager.admin_report_average_order_value, "order stats", AccountManager.PrivilegeLevel.ADMIN),
             Command("admin report discount", self.order_manager.admin_report_discount_usage, "discount usage", AccountManager.PrivilegeLevel.ADMIN),
+            Command("admin db check-totals", self.order_manager.admin_check_totals, "compare cached order totals with the db", AccountManager.PrivilegeLevel.ADMIN),
+            Command("admin import", self.order_manager.admin_import, "import orders from csv / jsonl", AccountManager.PrivilegeLevel.ADMIN),
+            Command("admin export", self.order_manager.admin_export, "export orders / items / totals to csv / jsonl", AccountManager.PrivilegeLevel.ADMIN),
             Command("admin db reset", self.db.reset_database, "reset database", AccountManager.PrivilegeLevel.ADMIN),
-        ]
+            Command("admin db rebuild-totals", self.db.rebuild_order_totals, "rebuild order totals", AccountManager.PrivilegeLevel.ADMIN),
+            Command("admin debug stats", SQL_TRACER.show_stats, "sql statements + time per command (needs --trace-sql)", AccountManager.PrivilegeLevel.ADMIN),
+            Command("admin debug profile", self.debug_profile, "run a command under the profiler + show where its time went", AccountManager.PrivilegeLevel.ADMIN),
+        )
+
+    def run(self, *args: str, batch: str | None = None, chunk_size: int | None = None,
+            quiet: bool = False, startup_profile: bool = False):
+        """run the launch command (if any), then the repl / batch script"""
+        parser = self.parser
+        if startup_profile:
+            # start up exactly as a till would (launch command included), then report
+            if args:
+                parser.parse_and_execute(shlex.join(args))
+            with startup_phase("order load"):
+                self.order_manager.first_order_page()
+            self.print_startup_profile()
+            return
+
+        if batch is not None:
+            # any launch command runs first (as "line 0"), e.g. a login for the script
+            leading = [shlex.join(args)] if args else []
+            runner = BatchRunner(parser, self.db, chunk_size, quiet)
+            with (sys.stdin if batch == "-" else open(batch, encoding="utf-8")) as script:
+                failed = runner.run(chain(leading, script), first_line=0 if leading else 1)
+            sys.exit(1 if failed else 0)
 
         cprint("""
 welcome to papa-pizza, the sequel!!! 🍕,
@@ -1110,28 +2836,101 @@ for more information, type 'help' or 'h' at any time.
 to exit the program, type 'quit' or 'exit'.""")
 
         if args:
-            parser.parse_and_execute(" ".join(args))
+            parser.parse_and_execute(shlex.join(args))
         parser.start_repl()
 
     @staticmethod
-    def show_menu():
+    def print_startup_profile():
+        """print the time each start-up phase took; 'other' is module + command set-up"""
+        total = time.perf_counter() - _IMPORTS_STARTED
+        cprint("startup profile (ms)", None, attrs=["bold"])
+        for name, seconds in STARTUP_PHASES.items():
+            print(f"  {name:<14}{seconds * 1000:>8.1f}")
+        print(f"  {'other':<14}{(total - sum(STARTUP_PHASES.values())) * 1000:>8.1f}")
+        cprint(f"  {'total':<14}{total * 1000:>8.1f}", "green" if total < 0.1 else "yellow")
+        print("(from the first import; python's own start-up is not included)")
+
+    def debug_profile(self, *command: str):
+        """run one command under cProfile and print its slowest functions"""
+        if not command:
+            error("usage: admin debug profile <command...>"); return
+        import cProfile
+        line = shlex.join(command)
+        profile = cProfile.Profile()
+        # keep --profile's own profile of this command out of the way while we run + report
+        with PROFILER.running(None):
+            try:
+                with PROFILER.running(profile):
+                    self.parser.parse_and_execute(line)
+            except ProfilerBusyError as e:
+                # only starting the profile; errors from the command itself are its own
+                error(f"cannot profile: {e}"); return
+            PROFILER.print_stats(line, profile)
+
+    def show_menu(self):
         """print cached menu grouped by item class"""
         cprint("papa-pizza's famous menu", None, attrs=["bold"])
-        if not menu:
-            cprint("menu empty", "red"); return
+        self.order_manager.sync_menu()
+        if not self.order_manager.menu:
+            cprint("menu empty", "yellow"); return
         current_type = None
-        for item in menu:
+        for item in self.order_manager.menu:
             t = type(item).__name__
             if t != current_type:
                 current_type = t
                 cprint(f"\n{t}:", "green", attrs=["bold"])
-            cprint(f"{item.name}: ${item.price:.2f}", "green")
+            cprint(f"{item.name}: {format_money(item.price)}", "green")
 
 # entry point
+def parse_cli(argv: list[str]) -> argparse.Namespace:
+    """parse launch options; anything after them is run as the first command"""
+    cli = argparse.ArgumentParser(prog="main.py", description="papa-pizza customer database")
+    cli.add_argument("--db", default=os.environ.get("PAPA_PIZZA_DB"),
+                     help="database file (env PAPA_PIZZA_DB, default papa-pizza.db)")
+    cli.add_argument("--storage", default=os.environ.get("PAPA_PIZZA_STORAGE", DEFAULT_STORAGE_PROFILE),
+                     help=f"storage profile: {', '.join(STORAGE_PROFILES)} (env PAPA_PIZZA_STORAGE)")
+    cli.add_argument("--batch", metavar="FILE",
+                     help="run commands from FILE ('-' for stdin) without prompting, then exit")
+    cli.add_argument("--chunk", type=int, default=None, metavar="N",
+                     help="with --batch, commit every N commands instead of once at the end")
+    cli.add_argument("--quiet", action="store_true",
+                     help="with --batch, hide command output and only report failures + the summary")
+    cli.add_argument("--trace-sql", action="store_true",
+                     help="count + time every sql statement per command (see admin debug stats)")
+    cli.add_argument("--sql-log", metavar="FILE",
+                     help="with tracing, also append one json line of sql stats per command to FILE")
+    cli.add_argument("--profile", action="store_true",
+                     help="profile every command with cProfile; print the slowest functions per command at exit")
+    cli.add_argument("--profile-out", metavar="DIR",
+                     help="profile every command; at exit write one <command>.pstats file per command to DIR")
+    cli.add_argument("--startup-profile", action="store_true",
+                     help="start up (running any launch command), print the time each phase took, then exit")
+    cli.add_argument("command", nargs=argparse.REMAINDER, help="command to run before the repl starts")
+    options = cli.parse_args(argv)
+    if options.chunk is not None and options.chunk < 1:
+        cli.error("--chunk must be at least 1")
+    if options.storage not in STORAGE_PROFILES:
+        cli.error(f"unknown storage profile '{options.storage}' (choose from {', '.join(STORAGE_PROFILES)})")
+    return options
+
 def main():
     """entrypoint wrapper"""
-    args = sys.argv[1:]
-    Application(*args)
+    STARTUP_PHASES["imports"] = time.perf_counter() - _IMPORTS_STARTED
+    options = parse_cli(sys.argv[1:])
+    storage = STORAGE_PROFILES[options.storage]
+    if options.db:
+        storage = replace(storage, path=options.db)
+    if options.trace_sql or options.sql_log:
+        SQL_TRACER.enable(options.sql_log)
+    if options.profile or options.profile_out:
+        PROFILER.enable(options.profile_out)
+    try:
+        Application(storage).run(*options.command, batch=options.batch, chunk_size=options.chunk,
+                                 quiet=options.quiet, startup_profile=options.startup_profile)
+    except BrokenPipeError:
+        # stdout was piped into something (e.g. head) that stopped reading an export
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
 
 # signal handler
 class SignalHandler: